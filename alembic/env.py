@@ -18,8 +18,13 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import metadata của models
+from app.config import settings
 from app.database import Base
 
+# ưu tiên DATABASE_URL trong env (Render) thay vì url cứng trong alembic.ini
+if settings.DATABASE_URL:
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
 target_metadata = Base.metadata
 
 
@@ -0,0 +1,65 @@
+"""transactions: gộp index summary vào (user_id, date, id) INCLUDE
+
+Revision ID: 2d7a9f4b6e15
+Revises: 9b4f1e6c2a73
+Create Date: 2026-10-18 23:05:41.207356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7a9f4b6e15'
+down_revision: Union[str, Sequence[str], None] = '9b4f1e6c2a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'ix_transactions_user_date_id_live'
+SUMMARY_INDEX = 'ix_transactions_user_date_summary_live'
+INCLUDE = ['type', 'amount', 'category_id']
+
+
+def _swap_date_id_index(include: list[str]):
+    """
+    Dựng lại INDEX với INCLUDE mới dưới tên tạm rồi đổi tên: lúc nào cũng có
+    sẵn 1 index (user_id, date, id) cho list / feed, không khoá ghi bảng.
+    """
+    tmp = INDEX + '_new'
+    op.create_index(
+        tmp,
+        'transactions',
+        ['user_id', 'date', 'id'],
+        postgresql_include=include,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+        postgresql_concurrently=True,
+        if_not_exists=True,
+    )
+    op.drop_index(INDEX, table_name='transactions', postgresql_concurrently=True, if_exists=True)
+    op.execute(f'ALTER INDEX {tmp} RENAME TO {INDEX}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bảng ghi nhiều nhất: 1 index (user_id, date, id) INCLUDE thay cho 2 index
+    # cùng cột đầu, summary vẫn index-only scan
+    with op.get_context().autocommit_block():
+        _swap_date_id_index(INCLUDE)
+        op.drop_index(SUMMARY_INDEX, table_name='transactions', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            SUMMARY_INDEX,
+            'transactions',
+            ['user_id', 'date'],
+            postgresql_include=INCLUDE,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        _swap_date_id_index([])
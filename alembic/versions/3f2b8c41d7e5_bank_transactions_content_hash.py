@@ -0,0 +1,47 @@
+"""bank_transactions content_hash
+
+Revision ID: 3f2b8c41d7e5
+Revises: 6c1e0d7f9a24
+Create Date: 2026-10-18 14:02:11.406215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2b8c41d7e5'
+down_revision: Union[str, Sequence[str], None] = '6c1e0d7f9a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bank_transactions', sa.Column('content_hash', sa.String(), nullable=True))
+
+    # CONCURRENTLY không chạy được trong transaction -> autocommit
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_bank_transactions_account_hash',
+            'bank_transactions',
+            ['account_id', 'content_hash'],
+            unique=True,
+            postgresql_where=sa.text('content_hash IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_bank_transactions_account_hash',
+            table_name='bank_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('bank_transactions', 'content_hash')
@@ -0,0 +1,54 @@
+"""user_totals
+
+Revision ID: 4231eb4e627f
+Revises: 90597bffd24d
+Create Date: 2026-10-18 10:02:17.842906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4231eb4e627f'
+down_revision: Union[str, Sequence[str], None] = '90597bffd24d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_totals',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('total_income', sa.Float(), server_default='0', nullable=False),
+        sa.Column('total_expense', sa.Float(), server_default='0', nullable=False),
+        sa.Column('tx_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+    # backfill từ lịch sử hiện có
+    # (chạy lại được bằng: python -m app.commands rebuild-totals)
+    op.execute(
+        """
+        INSERT INTO user_totals (user_id, total_income, total_expense, tx_count)
+        SELECT
+            user_id,
+            COALESCE(SUM(amount) FILTER (WHERE type = 'income'), 0),
+            COALESCE(SUM(amount) FILTER (WHERE type = 'expense'), 0),
+            COUNT(*)
+        FROM transactions
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_totals')
@@ -0,0 +1,56 @@
+"""money columns Float -> BIGINT (đồng)
+
+Revision ID: 5a9c3e7d2f16
+Revises: e48d2f6a1b90
+Create Date: 2026-10-18 16:05:39.552107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e7d2f16'
+down_revision: Union[str, Sequence[str], None] = 'e48d2f6a1b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# VND không có xu: 1 đơn vị BIGINT = 1 đồng
+MONEY_COLUMNS = [
+    ('transactions', 'amount'),
+    ('wallets', 'balance'),
+    ('bank_accounts', 'balance'),
+    ('bank_transactions', 'amount'),
+    ('bank_transactions', 'balance_after'),
+    ('budgets', 'amount'),
+    ('user_totals', 'total_income'),
+    ('user_totals', 'total_expense'),
+    ('budget_period_spend', 'spent'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ALTER TYPE viết lại cả bảng (khoá ACCESS EXCLUSIVE) -> chạy lúc ít traffic
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.BigInteger(),
+            existing_type=sa.Float(),
+            postgresql_using=f'round({column})::bigint',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.Float(),
+            existing_type=sa.BigInteger(),
+            postgresql_using=f'{column}::double precision',
+        )
@@ -0,0 +1,52 @@
+"""device_tokens
+
+Revision ID: 6c1e0d7f9a24
+Revises: ad0bf5ae38c1
+Create Date: 2026-10-18 12:04:33.918260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c1e0d7f9a24'
+down_revision: Union[str, Sequence[str], None] = 'ad0bf5ae38c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'device_tokens',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token'),
+    )
+    op.create_index('ix_device_tokens_user_id', 'device_tokens', ['user_id'])
+
+    # chuyển token đang lưu ở users.fcm_token sang bảng mới
+    op.execute(
+        """
+        INSERT INTO device_tokens (id, user_id, token)
+        SELECT gen_random_uuid(), id, fcm_token
+        FROM users
+        WHERE fcm_token IS NOT NULL AND fcm_token <> ''
+        ON CONFLICT (token) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_device_tokens_user_id', table_name='device_tokens')
+    op.drop_table('device_tokens')
@@ -0,0 +1,54 @@
+"""hot-path indexes (family_members, bank_transactions, budgets, ...)
+
+Revision ID: 7d4a1c8e3b52
+Revises: 5a9c3e7d2f16
+Create Date: 2026-10-18 16:48:02.291774
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4a1c8e3b52'
+down_revision: Union[str, Sequence[str], None] = '5a9c3e7d2f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tên index, bảng, cột)
+INDEXES = [
+    ('ix_family_members_owner_status', 'family_members', ['owner_id', 'status']),
+    ('ix_family_members_member_status', 'family_members', ['member_id', 'status']),
+    ('ix_bank_transactions_account_date_id', 'bank_transactions', ['account_id', 'date', 'id']),
+    ('ix_bank_accounts_user_id', 'bank_accounts', ['user_id']),
+    ('ix_budgets_user_id', 'budgets', ['user_id']),
+    ('ix_wallets_user_id', 'wallets', ['user_id']),
+    ('ix_categories_user_created', 'categories', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY không chạy được trong transaction -> autocommit
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,139 @@
+"""baseline schema
+
+Revision ID: 8e9860b856f5
+Revises: 
+Create Date: 2026-10-18 09:12:41.305127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e9860b856f5'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # DB cũ tạo bằng Base.metadata.create_all (chưa có alembic_version) đã có
+    # sẵn các bảng này -> bỏ qua, không cần `alembic stamp` tay trước khi deploy
+    op.create_table(
+        'users',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('fcm_token', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'categories',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('icon', sa.String(), nullable=False),
+        sa.Column('color', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'wallets',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('balance', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'transactions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('note', sa.String(), nullable=True),
+        sa.Column('date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'budgets',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('period', sa.String(), nullable=True),
+        sa.Column('type', sa.String(), nullable=True),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('is_active', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'family_members',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('member_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('group_name', sa.String(), nullable=True),
+        sa.Column('display_name', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), server_default='pending', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['member_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'bank_accounts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('bank_name', sa.String(), nullable=False),
+        sa.Column('account_number', sa.String(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'bank_transactions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('date', sa.DateTime(), nullable=True),
+        sa.Column('balance_after', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['bank_accounts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bank_transactions')
+    op.drop_table('bank_accounts')
+    op.drop_table('family_members')
+    op.drop_table('budgets')
+    op.drop_table('transactions')
+    op.drop_table('wallets')
+    op.drop_table('categories')
+    op.drop_table('users')
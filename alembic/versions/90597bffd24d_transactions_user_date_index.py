@@ -0,0 +1,41 @@
+"""transactions (user_id, date, id) index
+
+Revision ID: 90597bffd24d
+Revises: 8e9860b856f5
+Create Date: 2026-10-18 09:20:05.517382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '90597bffd24d'
+down_revision: Union[str, Sequence[str], None] = '8e9860b856f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY không chạy được trong transaction -> autocommit
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_user_date_id',
+            'transactions',
+            ['user_id', 'date', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_transactions_user_date_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,72 @@
+"""daily_rollups (tổng thu / chi theo ngày, danh mục, loại)
+
+Revision ID: 9b4f1e6c2a73
+Revises: f6b2d8a4c1e7
+Create Date: 2026-10-18 21:12:36.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f1e6c2a73'
+down_revision: Union[str, Sequence[str], None] = 'f6b2d8a4c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'daily_rollups',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('amount', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('tx_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # NULLS NOT DISTINCT (Postgres 15+): giao dịch chưa phân loại cũng upsert vào 1 dòng
+    op.create_index(
+        'uq_daily_rollups_user_day_category_type',
+        'daily_rollups',
+        ['user_id', 'day', 'category_id', 'type'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+
+    # backfill từ lịch sử hiện có, cắt ngày theo DEFAULT_TIMEZONE
+    # (chạy lại được bằng: python -m app.commands rebuild-rollups)
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO daily_rollups (user_id, day, category_id, type, amount, tx_count)
+            SELECT
+                user_id,
+                (date AT TIME ZONE :tz)::date AS day,
+                category_id,
+                type,
+                SUM(amount),
+                COUNT(*)
+            FROM transactions
+            WHERE user_id IS NOT NULL AND deleted_at IS NULL AND date IS NOT NULL
+            GROUP BY user_id, day, category_id, type
+            """
+        ).bindparams(tz=settings.DEFAULT_TIMEZONE)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_daily_rollups_user_day_category_type', table_name='daily_rollups')
+    op.drop_table('daily_rollups')
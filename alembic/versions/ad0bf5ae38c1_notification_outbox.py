@@ -0,0 +1,50 @@
+"""notification_outbox
+
+Revision ID: ad0bf5ae38c1
+Revises: 4231eb4e627f
+Create Date: 2026-10-18 11:15:52.130448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad0bf5ae38c1'
+down_revision: Union[str, Sequence[str], None] = '4231eb4e627f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('body', sa.String(), nullable=False),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('status', sa.String(), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_notification_outbox_pending',
+        'notification_outbox',
+        ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notification_outbox_pending', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -0,0 +1,42 @@
+"""transactions covering index for summary
+
+Revision ID: b71e5a0c9d38
+Revises: 3f2b8c41d7e5
+Create Date: 2026-10-18 14:41:27.118093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e5a0c9d38'
+down_revision: Union[str, Sequence[str], None] = '3f2b8c41d7e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY không chạy được trong transaction -> autocommit
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_user_date_summary',
+            'transactions',
+            ['user_id', 'date'],
+            postgresql_include=['type', 'amount', 'category_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_transactions_user_date_summary',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,38 @@
+"""resource_versions (ETag / 304 cho các GET list)
+
+Revision ID: c3e9a7f15b84
+Revises: 7d4a1c8e3b52
+Create Date: 2026-10-18 18:05:41.127503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7f15b84'
+down_revision: Union[str, Sequence[str], None] = '7d4a1c8e3b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # chưa có dòng = version 0, không cần backfill
+    op.create_table(
+        'resource_versions',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('resource', sa.String(length=32), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'resource'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resource_versions')
@@ -0,0 +1,90 @@
+"""budget_period_spend
+
+Revision ID: e48d2f6a1b90
+Revises: b71e5a0c9d38
+Create Date: 2026-10-18 15:20:48.734419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e48d2f6a1b90'
+down_revision: Union[str, Sequence[str], None] = 'b71e5a0c9d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'budget_period_spend',
+        sa.Column('budget_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('spent', sa.Float(), server_default='0', nullable=False),
+        sa.Column('alert_level', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('budget_id', 'period_start'),
+    )
+
+    # seed kỳ hiện tại (+ kỳ sau đã có giao dịch ghi ngày trước) cho các budget
+    # đang có, cùng công thức với services.budgets.seed_budget_spend; kỳ hiện tại
+    # đặt alert_level theo mức hiện tại để không báo lại ngưỡng đã vượt
+    # (chạy lại được bằng: python -m app.commands rebuild-budget-spend)
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO budget_period_spend (budget_id, period_start, spent, alert_level)
+            SELECT
+                budget_id,
+                period_start,
+                SUM(amount),
+                CASE
+                    WHEN NOT is_current THEN 0
+                    WHEN budget_amount > 0 AND SUM(amount) >= budget_amount THEN 100
+                    WHEN budget_amount > 0 AND SUM(amount) >= budget_amount * 80 / 100 THEN 80
+                    ELSE 0
+                END
+            FROM (
+                SELECT
+                    b.id AS budget_id,
+                    b.amount AS budget_amount,
+                    COALESCE(
+                        timezone(:tz, date_trunc(u.unit, timezone(:tz, t.date))), cur.start
+                    ) AS period_start,
+                    COALESCE(
+                        timezone(:tz, date_trunc(u.unit, timezone(:tz, t.date))), cur.start
+                    ) = cur.start AS is_current,
+                    COALESCE(t.amount, 0) AS amount
+                FROM budgets b
+                CROSS JOIN LATERAL (
+                    SELECT CASE
+                        WHEN b.period IN ('day', 'week', 'month', 'year') THEN b.period
+                        ELSE 'month'
+                    END AS unit
+                ) u
+                CROSS JOIN LATERAL (
+                    SELECT timezone(:tz, date_trunc(u.unit, timezone(:tz, now()))) AS start
+                ) cur
+                LEFT JOIN transactions t
+                    ON t.user_id = b.user_id
+                    AND t.type = 'expense'
+                    AND (b.type != 'category' OR t.category_id = b.category_id)
+                    AND t.date >= cur.start
+            ) matched
+            GROUP BY budget_id, period_start, budget_amount, is_current
+            """
+        ).bindparams(tz=settings.DEFAULT_TIMEZONE)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('budget_period_spend')
@@ -0,0 +1,92 @@
+"""transactions: updated_at, deleted_at (tombstone), change_seq
+
+Revision ID: f6b2d8a4c1e7
+Revises: c3e9a7f15b84
+Create Date: 2026-10-18 19:12:09.553820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b2d8a4c1e7'
+down_revision: Union[str, Sequence[str], None] = 'c3e9a7f15b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tên index cũ, tên index mới, cột, INCLUDE): index mới chỉ chứa dòng chưa xoá
+LIVE_INDEXES = [
+    ('ix_transactions_user_date_id', 'ix_transactions_user_date_id_live', ['user_id', 'date', 'id'], None),
+    (
+        'ix_transactions_user_date_summary',
+        'ix_transactions_user_date_summary_live',
+        ['user_id', 'date'],
+        ['type', 'amount', 'category_id'],
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # default hằng (now() tính 1 lần lúc ALTER) -> Postgres không viết lại bảng
+    op.add_column(
+        'transactions',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.add_column('transactions', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    # dòng cũ change_seq = 0: sync đầu tiên (không có token) vẫn lấy đủ, token gồm cả id
+    op.add_column(
+        'transactions',
+        sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_user_change_seq',
+            'transactions',
+            ['user_id', 'change_seq', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for old, new, columns, include in LIVE_INDEXES:
+            op.create_index(
+                new,
+                'transactions',
+                columns,
+                postgresql_include=include or [],
+                postgresql_where=sa.text('deleted_at IS NULL'),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(old, table_name='transactions', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # tombstone sẽ hiện lại như giao dịch thường: xoá hẳn trước khi bỏ cột
+    op.execute("DELETE FROM transactions WHERE deleted_at IS NOT NULL")
+
+    with op.get_context().autocommit_block():
+        for old, new, columns, include in LIVE_INDEXES:
+            op.create_index(
+                old,
+                'transactions',
+                columns,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(new, table_name='transactions', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(
+            'ix_transactions_user_change_seq',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.drop_column('transactions', 'change_seq')
+    op.drop_column('transactions', 'deleted_at')
+    op.drop_column('transactions', 'updated_at')
@@ -0,0 +1,131 @@
+# app/commands.py
+"""
+Lệnh bảo trì chạy tay / cron job:
+
+    python -m app.commands rebuild-totals [--user <uuid>]
+    python -m app.commands rebuild-budget-spend [--user <uuid>]
+    python -m app.commands rebuild-rollups [--user <uuid>]
+    python -m app.commands dispatch-outbox [--once]
+    python -m app.commands purge-outbox [--days 7]
+    python -m app.commands purge-tombstones [--days 30]
+"""
+import argparse
+import time
+from uuid import UUID
+
+from app.database import SessionLocal
+
+
+def rebuild_totals(args):
+    from app.services.totals import rebuild_user_totals
+
+    db = SessionLocal()
+    try:
+        count = rebuild_user_totals(db, args.user)
+    finally:
+        db.close()
+    print(f"✅ Đã tính lại user_totals cho {count} user")
+
+
+def rebuild_budget_spend(args):
+    from app.services.budgets import seed_budget_spend
+
+    db = SessionLocal()
+    try:
+        count = seed_budget_spend(db, user_id=args.user)
+        db.commit()
+    finally:
+        db.close()
+    print(f"✅ Đã tính lại {count} dòng bộ đếm budget (kỳ hiện tại + kỳ sau)")
+
+
+def rebuild_rollups(args):
+    from app.services.rollups import rebuild_daily_rollups
+
+    db = SessionLocal()
+    try:
+        count = rebuild_daily_rollups(db, args.user)
+    finally:
+        db.close()
+    print(f"✅ Đã tính lại {count} dòng daily_rollups")
+
+
+def dispatch_outbox(args):
+    """
+    Chạy worker outbox thành process riêng (khi tắt OUTBOX_WORKER_ENABLED trên API)
+    """
+    from app.config import settings
+    from app.notifications import init_firebase
+    from app.services.outbox import dispatch_once
+
+    init_firebase()
+    while True:
+        db = SessionLocal()
+        try:
+            handled = dispatch_once(db)
+        finally:
+            db.close()
+
+        if args.once:
+            print(f"✅ Đã xử lý {handled} notif")
+            return
+        if not handled:
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+def purge_outbox(args):
+    from app.services.outbox import purge_sent
+
+    db = SessionLocal()
+    try:
+        count = purge_sent(db, args.days)
+    finally:
+        db.close()
+    print(f"✅ Đã xoá {count} notif đã gửi")
+
+
+def purge_tombstones(args):
+    from app.services.tombstones import purge_tombstones as purge
+
+    db = SessionLocal()
+    try:
+        count = purge(db, args.days)
+    finally:
+        db.close()
+    print(f"✅ Đã xoá {count} giao dịch đã xoá mềm")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-totals", help="tính lại bảng user_totals từ transactions")
+    p.add_argument("--user", type=UUID, default=None, help="chỉ tính lại cho 1 user")
+    p.set_defaults(func=rebuild_totals)
+
+    p = sub.add_parser("rebuild-budget-spend", help="tính lại budget_period_spend (kỳ hiện tại + kỳ sau)")
+    p.add_argument("--user", type=UUID, default=None, help="chỉ tính lại cho 1 user")
+    p.set_defaults(func=rebuild_budget_spend)
+
+    p = sub.add_parser("rebuild-rollups", help="tính lại daily_rollups từ transactions")
+    p.add_argument("--user", type=UUID, default=None, help="chỉ tính lại cho 1 user")
+    p.set_defaults(func=rebuild_rollups)
+
+    p = sub.add_parser("dispatch-outbox", help="gửi push notif đang chờ trong outbox")
+    p.add_argument("--once", action="store_true", help="chỉ xử lý 1 lô rồi thoát")
+    p.set_defaults(func=dispatch_outbox)
+
+    p = sub.add_parser("purge-outbox", help="xoá notif đã gửi cũ")
+    p.add_argument("--days", type=int, default=7)
+    p.set_defaults(func=purge_outbox)
+
+    p = sub.add_parser("purge-tombstones", help="xoá hẳn giao dịch đã xoá mềm cũ (tombstone)")
+    p.add_argument("--days", type=int, default=30)
+    p.set_defaults(func=purge_tombstones)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,4 +9,49 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ACCESS_TOKEN_EXPIRE_HOURS: int = 24
 
+    # sync: Session + threadpool | async: AsyncSession (asyncpg) cho các route đọc nóng
+    DB_MODE: str = os.getenv("DB_MODE", "sync")
+
+    # connection pool (dùng chung cho engine sync và async)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # số thread chạy route sync, mặc định = số connection tối đa của pool
+    # (thread dư chỉ đứng chờ connection)
+    THREADPOOL_SIZE: int = int(
+        os.getenv("THREADPOOL_SIZE", DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    )
+
+    # bcrypt: cost factor + process pool riêng
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", 8))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+    # múi giờ mặc định khi gom nhóm theo ngày / tuần / tháng
+    DEFAULT_TIMEZONE: str = os.getenv("DEFAULT_TIMEZONE", "Asia/Ho_Chi_Minh")
+
+    # import sao kê ngân hàng: số dòng tối đa mỗi file
+    BANK_IMPORT_MAX_ROWS: int = int(os.getenv("BANK_IMPORT_MAX_ROWS", 50000))
+
+    # request chạy >= N câu SQL thì log cảnh báo (N+1)
+    METRICS_N_PLUS_ONE_WARN: int = int(os.getenv("METRICS_N_PLUS_ONE_WARN", 25))
+
+    # cache user đã xác thực trong get_current_user
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 2048))
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+
+    # outbox push notif
+    OUTBOX_WORKER_ENABLED: bool = os.getenv("OUTBOX_WORKER_ENABLED", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_CONCURRENCY: int = int(os.getenv("OUTBOX_CONCURRENCY", 8))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", 2))
+    OUTBOX_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 10))
+    # worker giữ dòng đã nhận trong bao lâu; chết giữa chừng thì hết hạn là worker khác lấy lại
+    OUTBOX_LEASE_SECONDS: float = float(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+
 settings = Settings()
@@ -1,9 +1,82 @@
 #database.py
+import threading
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+
+# --------- pool có đo thời gian chờ connection ---------
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "count": self.count,
+                "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 3),
+                "total_s": round(self.total, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class _WaitTimingMixin:
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        stats = self.wait_stats
+        with stats._lock:
+            stats.waiting += 1
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with stats._lock:
+                stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with stats._lock:
+                stats.waiting -= 1
+                stats.count += 1
+                stats.total += elapsed
+                stats.max = max(stats.max, elapsed)
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    wait_stats = PoolWaitStats()
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **pool_options(),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -14,3 +87,74 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --------- async (asyncpg), dùng khi DB_MODE=async ---------
+# tạo lười: chế độ sync không cần cài asyncpg
+async_engine = None
+AsyncSessionLocal = None
+
+
+def async_database_url(url: str) -> str:
+    # postgres:// | postgresql:// | postgresql+psycopg2:// -> postgresql+asyncpg://
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def init_async_engine():
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(
+            async_database_url(settings.DATABASE_URL),
+            poolclass=InstrumentedAsyncQueuePool,
+            **pool_options(),
+        )
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+    return async_engine
+
+
+async def dispose_async_engine():
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+
+
+def async_session():
+    # session ngoài dependency (export stream, route hash mật khẩu)
+    if AsyncSessionLocal is None:
+        init_async_engine()
+    return AsyncSessionLocal()
+
+
+async def get_async_db():
+    async with async_session() as db:
+        yield db
+
+
+# --------- số liệu pool (GET /stats) ---------
+def _describe_pool(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # overflow() âm khi pool chưa mở đủ pool_size connection
+        "overflow": max(pool.overflow(), 0),
+        "timeout": pool.timeout(),
+        "wait": pool.wait_stats.snapshot(),
+    }
+
+
+def pool_stats() -> dict:
+    result = {"sync": _describe_pool(engine.pool)}
+    if async_engine is not None:
+        result["async"] = _describe_pool(async_engine.pool)
+    return result
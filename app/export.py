@@ -0,0 +1,120 @@
+# app/export.py
+"""
+Export lịch sử giao dịch dạng CSV / NDJSON, ghi ra từng lô khi DB trả về.
+RAM không phụ thuộc số dòng: server-side cursor (stream_results) + yield_per.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+
+from app.database import SessionLocal, async_session
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Không serialize được {type(value).__name__}")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date, UUID)):
+        return _json_default(value)
+    return value
+
+
+class _Encoder:
+    def __init__(self, columns: list[str], fmt: str):
+        self.columns = columns
+        self.fmt = fmt
+        self.buf = io.StringIO()
+        self.writer = csv.writer(self.buf)
+
+    def _flush(self) -> str:
+        chunk = self.buf.getvalue()
+        self.buf.seek(0)
+        self.buf.truncate()
+        return chunk
+
+    def header(self) -> str:
+        if self.fmt != "csv":
+            return ""
+        # BOM để Excel đọc đúng tiếng Việt; header gửi ngay, chưa cần chờ query
+        self.buf.write("\ufeff")
+        self.writer.writerow(self.columns)
+        return self._flush()
+
+    def rows(self, partition) -> str:
+        for row in partition:
+            if self.fmt == "csv":
+                self.writer.writerow([_cell(v) for v in row])
+            else:
+                self.buf.write(
+                    json.dumps(dict(zip(self.columns, row)), ensure_ascii=False, default=_json_default)
+                )
+                self.buf.write("\n")
+        return self._flush()
+
+
+def _iter_export(stmt, columns: list[str], fmt: str):
+    # session riêng: session của request (get_db) đã đóng khi response bắt đầu stream
+    db = SessionLocal()
+    try:
+        encoder = _Encoder(columns, fmt)
+        if fmt == "csv":
+            yield encoder.header()
+
+        result = db.execute(
+            stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+        for partition in result.partitions():
+            yield encoder.rows(partition)
+    finally:
+        db.close()
+
+
+async def _aiter_export(stmt, columns: list[str], fmt: str):
+    # DB_MODE=async: cursor phía server của asyncpg, không giữ thread nào khi chờ DB
+    async with async_session() as db:
+        encoder = _Encoder(columns, fmt)
+        if fmt == "csv":
+            yield encoder.header()
+
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield encoder.rows(partition)
+
+
+def _streaming_response(body, fmt: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def export_response(stmt, fmt: str, filename: str) -> StreamingResponse:
+    """
+    stmt: select(...) các cột cần xuất (không select cả ORM object)
+    """
+    columns = [c.key for c in stmt.selected_columns]
+    return _streaming_response(_iter_export(stmt, columns, fmt), fmt, filename)
+
+
+def export_response_async(stmt, fmt: str, filename: str) -> StreamingResponse:
+    columns = [c.key for c in stmt.selected_columns]
+    return _streaming_response(_aiter_export(stmt, columns, fmt), fmt, filename)
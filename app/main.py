@@ -1,34 +1,59 @@
 # app/main.py
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.openapi.utils import get_openapi
 
-from app.database import Base, engine
+from app.config import settings
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import engine, init_async_engine, dispose_async_engine, pool_stats
 from app.routers import auth, category, wallet, transaction, budget, family, bank
+from app import metrics
 
-import firebase_admin
-from firebase_admin import credentials
-import os, json
+from app.services import outbox
+from app.services.auth import principal_cache
+from app.security import shutdown_password_pool
 
-# ✅ Init Firebase Admin TẠI ĐÂY và CHỈ ở đây
+# import app phải nhanh (cold start Render, mỗi worker uvicorn spawn lại):
+# - schema do Alembic quản lý (alembic upgrade head), không create_all
+# - Firebase / Resend init lúc gửi lần đầu (app/notifications.py, app/services/email.py)
+# - việc còn lại lúc khởi động / tắt nằm trong lifespan bên dưới
 
-if not firebase_admin._apps:
-    # ưu tiên dùng env JSON nếu có
-    raw = os.environ.get("FIREBASE_SERVICE_ACCOUNT_JSON")
-    if raw:
-        cred_info = json.loads(raw)
-        cred = credentials.Certificate(cred_info)
-    else:
-        # fallback dùng secret file (Render)
-        cred = credentials.Certificate("/etc/secrets/firebase-admin-key.json")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-    firebase_admin.initialize_app(cred)
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # threadpool khớp với connection pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+    # worker gửi push notif từ outbox
+    outbox_task = None
+    if settings.OUTBOX_WORKER_ENABLED:
+        outbox_task = asyncio.create_task(outbox.run_dispatcher())
+
+    # dựng OpenAPI schema 1 lần ở thread nền, không chặn request đầu tiên
+    openapi_task = asyncio.create_task(anyio.to_thread.run_sync(app.openapi))
 
-app = FastAPI()
+    yield
+
+    openapi_task.cancel()
+    if outbox_task:
+        outbox_task.cancel()
+    shutdown_password_pool()
+    await dispose_async_engine()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# latency + số câu SQL theo route -> GET /metrics
+metrics.install_sql_hooks(engine)
+app.add_middleware(metrics.MetricsMiddleware)
 
 def custom_openapi():
     if app.openapi_schema:
@@ -58,6 +83,26 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+
+# hết connection quá DB_POOL_TIMEOUT -> 503 cho client thử lại, không treo thêm
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Hệ thống đang quá tải, vui lòng thử lại sau"},
+        headers={"Retry-After": "1"},
+    )
+
+
+# DB_MODE=async: mọi route đụng DB chạy trên AsyncSession (asyncpg), giới hạn
+# bởi pool connection thay vì threadpool. GET query thẳng bằng await, route ghi
+# chạy thân hàm sync qua AsyncSession.run_sync (greenlet, không chiếm thread).
+# Đăng ký trước để được match trước route sync cùng path.
+if settings.DB_MODE == "async":
+    metrics.install_sql_hooks(init_async_engine().sync_engine)
+    for module in (auth, transaction, wallet, category, budget, family, bank):
+        app.include_router(module.aio_router)
+
 app.include_router(auth.router)
 app.include_router(category.router)
 app.include_router(wallet.router)
@@ -69,3 +114,24 @@ app.include_router(bank.router)
 @app.get("/")
 def root():
     return {"message": "Money Manager API running!"}
+
+
+@app.get("/stats", include_in_schema=False)
+async def stats():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "principal_cache": principal_cache.stats(),
+        "db_pool": pool_stats(),
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "busy": limiter.borrowed_tokens,
+        },
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render(pool_stats(), principal_cache.stats()),
+        media_type="text/plain; version=0.0.4",
+    )
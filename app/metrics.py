@@ -0,0 +1,204 @@
+# app/metrics.py
+"""
+Đo latency theo route + số câu SQL / thời gian SQL mỗi request,
+xuất dạng Prometheus text ở GET /metrics.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+_lock = threading.Lock()
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# key = (method, route)
+_latency: dict[tuple, Histogram] = {}
+_statements: dict[tuple, Histogram] = {}
+_db_time: dict[tuple, Histogram] = {}
+# key = (method, route, status)
+_requests: dict[tuple, int] = {}
+
+_sql_total = 0
+_sql_seconds = 0.0
+
+
+# --------- SQLAlchemy: đếm câu SQL ---------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _sql_total, _sql_seconds
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+
+    with _lock:
+        _sql_total += 1
+        _sql_seconds += elapsed
+
+
+def install_sql_hooks(engine):
+    """
+    Gắn vào engine sync (async thì truyền async_engine.sync_engine)
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request() -> tuple[RequestStats, object]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_request(method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+    key = (method, route)
+    with _lock:
+        _latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+        _statements.setdefault(key, Histogram(STATEMENT_BUCKETS)).observe(stats.statements)
+        _db_time.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(stats.db_time)
+        _requests[(method, route, status)] = _requests.get((method, route, status), 0) + 1
+
+    if stats.statements >= settings.METRICS_N_PLUS_ONE_WARN:
+        print(f"🐢 {method} {route} chạy {stats.statements} câu SQL ({stats.db_time * 1000:.0f} ms)")
+
+
+# --------- middleware ASGI ---------
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = start_request()
+        # để caller ASGI (benchmarks/query_budget.py) đọc lại số câu SQL của request
+        scope["request_stats"] = stats
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            end_request(token)
+            # dùng path template (/family/{member_id}) cho khỏi nổ số label
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            record_request(scope["method"], route_path, status_code, elapsed, stats)
+
+
+# --------- Prometheus text format ---------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**kwargs) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in kwargs.items()) + "}"
+
+
+def _render_histograms(lines, name, help_text, data):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), h in sorted(data.items()):
+        for bound, count in zip(h.buckets, h.counts):
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {count}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {h.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+
+def _render_samples(lines, name, help_text, kind, samples):
+    """
+    samples: [(labels dict, value), ...]
+    """
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+
+def render(pool_stats: dict, cache_stats: dict) -> str:
+    lines: list[str] = []
+
+    with _lock:
+        _render_samples(
+            lines, "http_requests_total", "Số request theo route và status", "counter",
+            [
+                ({"method": method, "route": route, "status": status}, count)
+                for (method, route, status), count in sorted(_requests.items())
+            ],
+        )
+        _render_histograms(lines, "http_request_duration_seconds", "Latency request theo route", _latency)
+        _render_histograms(lines, "http_request_db_statements", "Số câu SQL mỗi request", _statements)
+        _render_histograms(lines, "http_request_db_seconds", "Thời gian SQL mỗi request", _db_time)
+
+        _render_samples(lines, "db_statements_total", "Tổng số câu SQL", "counter", [({}, _sql_total)])
+        _render_samples(lines, "db_statement_seconds_total", "Tổng thời gian SQL", "counter", [({}, _sql_seconds)])
+
+    pools = sorted(pool_stats.items())
+    for name, help_text, kind, pick in (
+        ("db_pool_size", "pool_size đã cấu hình", "gauge", lambda p: p["size"]),
+        ("db_pool_checked_out", "Connection đang dùng", "gauge", lambda p: p["checked_out"]),
+        ("db_pool_overflow", "Connection overflow đang mở", "gauge", lambda p: p["overflow"]),
+        ("db_pool_waiting", "Request đang chờ connection", "gauge", lambda p: p["wait"]["waiting"]),
+        ("db_pool_wait_seconds_total", "Tổng thời gian chờ connection", "counter", lambda p: p["wait"]["total_s"]),
+        ("db_pool_timeouts_total", "Số lần hết hạn chờ connection", "counter", lambda p: p["wait"]["timeouts"]),
+    ):
+        _render_samples(lines, name, help_text, kind, [({"engine": mode}, pick(p)) for mode, p in pools])
+
+    _render_samples(lines, "principal_cache_hits_total", "Cache user hit", "counter", [({}, cache_stats["hits"])])
+    _render_samples(lines, "principal_cache_misses_total", "Cache user miss", "counter", [({}, cache_stats["misses"])])
+    _render_samples(lines, "principal_cache_size", "Số user trong cache", "gauge", [({}, cache_stats["size"])])
+
+    return "\n".join(lines) + "\n"
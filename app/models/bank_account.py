@@ -1,5 +1,5 @@
 # app/models/bank_account.py
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,6 +10,9 @@ from app.database import Base
 
 class BankAccount(Base):
     __tablename__ = "bank_accounts"
+    __table_args__ = (
+        Index("ix_bank_accounts_user_id", "user_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -17,7 +20,7 @@ class BankAccount(Base):
     bank_name = Column(String, nullable=False)
     account_number = Column(String, nullable=False)
 
-    balance = Column(Float, default=0.0)
+    balance = Column(BigInteger, default=0)  # đồng
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,5 +1,5 @@
 # app/models/bank_transaction.py
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,6 +10,18 @@ from app.database import Base
 
 class BankTransaction(Base):
     __tablename__ = "bank_transactions"
+    __table_args__ = (
+        # history / export của 1 account, sắp theo (date, id)
+        Index("ix_bank_transactions_account_date_id", "account_id", "date", "id"),
+        # chống nhập trùng khi import lại cùng 1 sao kê
+        Index(
+            "ux_bank_transactions_account_hash",
+            "account_id",
+            "content_hash",
+            unique=True,
+            postgresql_where=text("content_hash IS NOT NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
 
@@ -17,12 +29,15 @@ class BankTransaction(Base):
 
     # 'income' / 'expense' cho đồng bộ với transaction thường
     type = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(BigInteger, nullable=False)  # đồng
 
     description = Column(String, nullable=True)
     date = Column(DateTime, default=datetime.utcnow)
 
     # optional: số dư sau giao dịch
-    balance_after = Column(Float, nullable=True)
+    balance_after = Column(BigInteger, nullable=True)
+
+    # sha256 nội dung dòng sao kê, chỉ có ở giao dịch import (xem services/bank_import.py)
+    content_hash = Column(String, nullable=True)
 
     account = relationship("BankAccount", back_populates="transactions")
@@ -1,17 +1,33 @@
-from sqlalchemy import Column, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, String, BigInteger, ForeignKey, DateTime, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.database import Base
 
+class BoolText(TypeDecorator):
+    # cột is_active là varchar từ đầu: psycopg2 tự ghi True thành 'true',
+    # asyncpg thì báo lỗi kiểu -> tự đổi bool sang đúng chuỗi đó cho cả 2 driver
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return value
+
+
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index("ix_budgets_user_id", "user_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
-    amount = Column(Float, nullable=False)
+    amount = Column(BigInteger, nullable=False)  # đồng
     period = Column(String, default="month")
     type = Column(String, default="overall")
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
-    is_active = Column(String, default=True)
+    is_active = Column(BoolText, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+# app/models/budget_period_spend.py
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class BudgetPeriodSpend(Base):
+    """
+    Số đã chi của 1 budget trong 1 kỳ, cộng dồn mỗi khi tạo / sửa / xoá giao dịch
+    -> kiểm tra ngưỡng 80% / 100% không phải quét lại bảng transactions.
+    """
+    __tablename__ = "budget_period_spend"
+
+    budget_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("budgets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # đầu kỳ (giờ địa phương DEFAULT_TIMEZONE, lưu dạng timestamptz)
+    period_start = Column(DateTime(timezone=True), primary_key=True)
+    spent = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # ngưỡng cao nhất đã báo trong kỳ: 0 / 80 / 100, mỗi ngưỡng chỉ báo 1 lần
+    alert_level = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,38 @@
+# app/models/daily_rollup.py
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class DailyRollup(Base):
+    """
+    Tổng thu / chi của 1 user theo (ngày, danh mục, loại), cộng dồn mỗi khi
+    tạo / sửa / xoá giao dịch -> báo cáo 1 năm đọc tối đa 365 x số danh mục dòng,
+    không phụ thuộc số giao dịch.
+    """
+    __tablename__ = "daily_rollups"
+    __table_args__ = (
+        # khoá upsert + đọc theo khoảng ngày; category_id NULL (chưa phân loại)
+        # cũng chỉ được 1 dòng / ngày / loại
+        Index(
+            "uq_daily_rollups_user_day_category_type",
+            "user_id",
+            "day",
+            "category_id",
+            "type",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # ngày địa phương theo DEFAULT_TIMEZONE
+    day = Column(Date, nullable=False)
+    category_id = Column(UUID(as_uuid=True), nullable=True)
+    type = Column(String, nullable=False)  # income / expense
+    amount = Column(BigInteger, nullable=False, default=0, server_default="0")  # đồng
+    tx_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
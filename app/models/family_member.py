@@ -1,5 +1,5 @@
 # app/models/family_member.py
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -9,6 +9,11 @@ from app.database import Base
 
 class FamilyMember(Base):
     __tablename__ = "family_members"
+    __table_args__ = (
+        # owner xem nhóm của mình / member tìm các owner đang theo dõi mình
+        Index("ix_family_members_owner_status", "owner_id", "status"),
+        Index("ix_family_members_member_status", "member_id", "status"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
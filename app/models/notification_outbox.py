@@ -0,0 +1,39 @@
+# app/models/notification_outbox.py
+from sqlalchemy import Column, String, Integer, DateTime, Index, text
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
+import uuid
+
+from app.database import Base
+
+
+class NotificationOutbox(Base):
+    """
+    Push notif chờ gửi. Ghi cùng commit với thao tác nghiệp vụ,
+    worker nền (app/services/outbox.py) đọc ra và gửi FCM.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # worker chỉ quét các dòng đang chờ
+        Index(
+            "ix_notification_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # danh sách user nhận (token được tra lúc gửi)
+    user_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False)
+    title = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    data = Column(JSONB, nullable=True)
+
+    # trạng thái: pending / sent / dead
+    status = Column(String, nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
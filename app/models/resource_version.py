@@ -0,0 +1,23 @@
+# app/models/resource_version.py
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class ResourceVersion(Base):
+    """
+    Version dữ liệu của 1 user theo từng loại (transactions, wallets, ...),
+    tăng 1 mỗi khi có ghi -> ETag cho các GET list, poll không đổi trả 304.
+    """
+    __tablename__ = "resource_versions"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    resource = Column(String(32), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -6,11 +6,32 @@ from app.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # phục vụ list giao dịch theo user, sắp theo (date, id) + phân trang cursor
+        # partial: mọi query đọc đều lọc deleted_at IS NULL, tombstone không nằm trong index
+        # INCLUDE: GET /transactions/summary đủ cột để index-only scan, không đụng heap
+        Index(
+            "ix_transactions_user_date_id_live",
+            "user_id",
+            "date",
+            "id",
+            postgresql_include=["type", "amount", "category_id"],
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # GET /transactions/changes: đọc theo (change_seq, id) > token, gồm cả tombstone
+        Index("ix_transactions_user_change_seq", "user_id", "change_seq", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
     type = Column(String, nullable=False)  # income / expense
-    amount = Column(Float, nullable=False)
+    amount = Column(BigInteger, nullable=False)  # đồng
     note = Column(String, nullable=True)
     date = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # xoá mềm: giữ dòng làm tombstone cho /transactions/changes
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # version "transactions" của user lúc ghi dòng này (resource_versions),
+    # tăng dần theo thứ tự commit trong phạm vi 1 user -> sync token
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -0,0 +1,20 @@
+# app/models/user_totals.py
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class UserTotals(Base):
+    """
+    Tổng thu / chi của 1 user, cộng dồn mỗi khi tạo / sửa / xoá giao dịch
+    (thay cho SUM trên toàn bộ bảng transactions).
+    """
+    __tablename__ = "user_totals"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    total_income = Column(BigInteger, nullable=False, default=0, server_default="0")
+    total_expense = Column(BigInteger, nullable=False, default=0, server_default="0")
+    tx_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, ForeignKey, DateTime
+from sqlalchemy import Column, BigInteger, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -6,8 +6,12 @@ from app.database import Base
 
 class Wallet(Base):
     __tablename__ = "wallets"
+    __table_args__ = (
+        # list ví + tổng số dư ví trong list_family
+        Index("ix_wallets_user_id", "user_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
-    balance = Column(Float, default=0)
+    balance = Column(BigInteger, default=0)  # đồng
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,145 @@
 # app/notifications.py
-from firebase_admin import messaging
+import os, json
+import threading
+from functools import lru_cache
+
+from sqlalchemy.orm import Session
+
+from app.models.notification_outbox import NotificationOutbox
+
+# nhiều thread outbox có thể cùng gửi lần đầu -> chỉ 1 thread được init
+_init_lock = threading.Lock()
+
+
+def init_firebase():
+    """
+    Init Firebase Admin 1 lần cho cả process, lúc gửi notif đầu tiên.
+    firebase_admin import + đọc credentials mất vài trăm ms: không làm lúc
+    import app, worker uvicorn nào không gửi notif thì không tốn.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
+    with _init_lock:
+        if firebase_admin._apps:
+            return
+
+        # ưu tiên dùng env JSON nếu có
+        raw = os.environ.get("FIREBASE_SERVICE_ACCOUNT_JSON")
+        if raw:
+            cred_info = json.loads(raw)
+            cred = credentials.Certificate(cred_info)
+        else:
+            # fallback dùng secret file (Render)
+            cred = credentials.Certificate("/etc/secrets/firebase-admin-key.json")
+
+        firebase_admin.initialize_app(cred)
+
+
+# FCM cho tối đa 500 token / 1 lần gửi multicast
+FCM_MULTICAST_LIMIT = 500
+
+
+@lru_cache(maxsize=1)
+def _messaging():
+    init_firebase()
+    from firebase_admin import messaging
+    return messaging
+
+
+@lru_cache(maxsize=1)
+def dead_token_errors() -> tuple[type[Exception], ...]:
+    """
+    Các lỗi chắc chắn do token không còn dùng được -> xoá khỏi DB
+    """
+    messaging = _messaging()
+    return (
+        messaging.UnregisteredError,
+        messaging.SenderIdMismatchError,
+    )
+
+
+def _invalid_field(exc) -> str | None:
+    """
+    Field FCM chê trong lỗi INVALID_ARGUMENT (google.rpc.BadRequest), vd "message.token"
+    """
+    response = getattr(exc, "http_response", None)
+    if response is None:
+        return None
+    try:
+        details = response.json().get("error", {}).get("details", [])
+    except ValueError:
+        return None
+    for detail in details:
+        for violation in detail.get("fieldViolations", []):
+            if violation.get("field"):
+                return violation["field"]
+    return None
+
+
+def is_dead_token_error(exc) -> bool:
+    """
+    INVALID_ARGUMENT dùng chung cho token sai và payload sai (data, notification...):
+    chỉ coi là token chết khi FCM nói rõ lỗi nằm ở registration token, không thì
+    1 payload hỏng sẽ xoá sạch token còn sống của mọi người nhận.
+    """
+    if isinstance(exc, dead_token_errors()):
+        return True
+
+    from firebase_admin import exceptions as firebase_exceptions
+
+    if not isinstance(exc, firebase_exceptions.InvalidArgumentError):
+        return False
+    field = _invalid_field(exc)
+    if field is not None:
+        return field == "message.token"
+    return "registration token" in str(exc).lower()
+
+
+def is_permanent_error(exc) -> bool:
+    """
+    Lỗi của chính notif (payload sai), gửi lại bao nhiêu lần cũng vậy -> dead-letter luôn
+    """
+    from firebase_admin import exceptions as firebase_exceptions
+
+    return isinstance(exc, firebase_exceptions.InvalidArgumentError) and not is_dead_token_error(exc)
+
+
+def send_multicast(
+    tokens: list[str],
+    title: str,
+    body: str,
+    data: dict | None = None,
+) -> tuple[int, list[str], list[Exception]]:
+    """
+    Gửi 1 notif tới nhiều token, mỗi lô 500 token là 1 request FCM.
+    Trả về (số token gửi thành công, token chết cần xoá, lỗi tạm thời khác).
+    """
+    messaging = _messaging()
+    success = 0
+    dead_tokens: list[str] = []
+    errors: list[Exception] = []
+
+    for i in range(0, len(tokens), FCM_MULTICAST_LIMIT):
+        chunk = tokens[i:i + FCM_MULTICAST_LIMIT]
+        message = messaging.MulticastMessage(
+            tokens=chunk,
+            notification=messaging.Notification(title=title, body=body),
+            data=data or {},
+        )
+        resp = messaging.send_each_for_multicast(message)
+        success += resp.success_count
+
+        for token, r in zip(chunk, resp.responses):
+            if r.success:
+                continue
+            if is_dead_token_error(r.exception):
+                dead_tokens.append(token)
+            else:
+                errors.append(r.exception)
+
+    return success, dead_tokens, errors
+
 
 def send_notification_to_token(
     token: str,
@@ -14,6 +154,7 @@ def send_notification_to_token(
         print("⚠ Không có FCM token, bỏ qua gửi notif")
         return
 
+    messaging = _messaging()
     message = messaging.Message(
         token=token,
         notification=messaging.Notification(title=title, body=body),
@@ -24,3 +165,29 @@ def send_notification_to_token(
         print("✅ Sent FCM:", resp)
     except Exception as e:
         print("❌ FCM error:", e)
+
+
+def enqueue_notification(
+    db: Session,
+    user_ids,
+    title: str,
+    body: str,
+    data: dict | None = None,
+):
+    """
+    Ghi notif vào outbox, KHÔNG commit: đi chung commit với thao tác nghiệp vụ.
+    Worker nền sẽ gửi sau, request không phải chờ FCM.
+    """
+    user_ids = [uid for uid in user_ids if uid]
+    if not user_ids:
+        return
+
+    db.add(
+        NotificationOutbox(
+            user_ids=user_ids,
+            title=title,
+            body=body,
+            # FCM data chỉ nhận string
+            data={k: str(v) for k, v in (data or {}).items()},
+        )
+    )
@@ -0,0 +1,120 @@
+# app/pagination.py
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# /transactions/changes: mỗi lần sync lấy nhiều hơn 1 trang list
+DEFAULT_SYNC_SIZE = 500
+MAX_SYNC_SIZE = 2000
+
+
+def encode_cursor(date: datetime, row_id: UUID) -> str:
+    """
+    Cursor = base64("<date iso>|<id>"), client chỉ cần gửi lại nguyên chuỗi
+    """
+    raw = f"{date.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_str, id_str = raw.split("|", 1)
+        return datetime.fromisoformat(date_str), UUID(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ",
+        )
+
+
+def encode_sync_token(change_seq: int, row_id: UUID) -> str:
+    """
+    Sync token = base64("<change_seq>|<id>") của dòng cuối client đã nhận
+    """
+    raw = f"{change_seq}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[int, UUID]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        seq_str, id_str = raw.split("|", 1)
+        return int(seq_str), UUID(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sync token không hợp lệ",
+        )
+
+
+def keyset_filter(stmt, date_col, id_col, limit: int, before: str | None, after: str | None):
+    """
+    Phân trang theo (date, id) giảm dần, không dùng OFFSET.
+    - before: lấy các dòng CŨ hơn cursor (trang tiếp theo)
+    - after:  lấy các dòng MỚI hơn cursor (trang trước đó)
+
+    Lấy dư 1 dòng để biết còn trang sau không, gọi finish_page() với kết quả.
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chỉ được truyền before hoặc after",
+        )
+
+    if after:
+        date, row_id = decode_cursor(after)
+        stmt = (
+            stmt.where(tuple_(date_col, id_col) > tuple_(date, row_id))
+            .order_by(date_col.asc(), id_col.asc())
+        )
+    else:
+        if before:
+            date, row_id = decode_cursor(before)
+            stmt = stmt.where(tuple_(date_col, id_col) < tuple_(date, row_id))
+        stmt = stmt.order_by(date_col.desc(), id_col.desc())
+
+    return stmt.limit(limit + 1)
+
+
+def finish_page(rows, limit: int, after: str | None):
+    """
+    Trả về (rows, has_more) với rows luôn sắp theo date desc, id desc
+    """
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if after:
+        rows.reverse()
+
+    return rows, has_more
+
+
+def set_page_headers(response: Response, rows, has_more: bool, before: str | None, after: str | None):
+    """
+    X-Next-Cursor: truyền vào ?before= để lấy trang cũ hơn
+    X-Prev-Cursor: truyền vào ?after=  để lấy trang mới hơn
+    """
+    if not rows:
+        return
+
+    first, last = rows[0], rows[-1]
+
+    # đang đi theo after thì chắc chắn còn dòng cũ hơn (chính cursor)
+    has_older = True if after else has_more
+    # đang đi theo before thì chắc chắn còn dòng mới hơn (chính cursor)
+    has_newer = has_more if after else bool(before)
+
+    if has_older:
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+    if has_newer:
+        response.headers["X-Prev-Cursor"] = encode_cursor(first.date, first.id)
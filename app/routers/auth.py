@@ -1,37 +1,98 @@
 # app/routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import secrets
 
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, async_session, get_async_db, get_db
 from app.schemas.user import UserCreate, UserLogin, UserOut, FCMTokenIn, ForgotPasswordIn, ChangePasswordIn
 from app.models.user import User
-from app.security import hash_password, verify_password, create_access_token
-from app.services.auth import get_current_user  # 👈 dùng để lấy user từ JWT
+from app.security import (
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password_async,
+    verify_password_async,
+)
+from app.services.auth import (  # 👈 dùng để lấy user từ JWT
+    get_current_user,
+    get_current_user_async,
+    invalidate_principal,
+)
 from app.services.email import send_email
+from app.services.devices import register_device_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-@router.post("/register", response_model=UserOut)
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    exists = db.query(User).filter(User.email == data.email).first()
-    if exists:
-        raise HTTPException(400, "Email đã tồn tại")
+# --------- helper DB cho các route hash mật khẩu ---------
+# route là async def: bcrypt chạy trên process pool, DB chạy trong session ngắn
+# (threadpool, hoặc AsyncSession khi DB_MODE=async) -> connection trả về pool
+# TRƯỚC khi hash, không giữ suốt ~200ms
+def _find_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
 
-    user = User(email=data.email, password=hash_password(data.password))
+def _create_user(db: Session, email: str, password_hash: str) -> User:
+    user = User(email=email, password=password_hash)
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
 
+def _password_hash(db: Session, user_id) -> str | None:
+    # luôn đọc từ DB, không lấy từ current_user (có thể là bản cache của principal)
+    return db.scalar(select(User.password).where(User.id == user_id))
+
+
+def _set_password(db: Session, user_id, password_hash: str):
+    db.execute(update(User).where(User.id == user_id).values(password=password_hash))
+    db.commit()
+    invalidate_principal(user_id)
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _in_session(fn, *args):
+    if settings.DB_MODE == "async":
+        async with async_session() as db:
+            return await db.run_sync(fn, *args)
+    return await run_in_threadpool(_with_session, fn, *args)
+
+
+@router.post("/register", response_model=UserOut)
+async def register(data: UserCreate):
+    exists = await _in_session(_find_user_by_email, data.email)
+    if exists:
+        raise HTTPException(400, "Email đã tồn tại")
+
+    password_hash = await hash_password_async(data.password)
+    return await _in_session(_create_user, data.email, password_hash)
+
+
 @router.post("/login")
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.password):
+async def login(data: UserLogin):
+    user = await _in_session(_find_user_by_email, data.email)
+    if not user:
+        raise HTTPException(400, "Sai email hoặc mật khẩu")
+
+    ok, new_hash = await verify_and_update_password_async(data.password, user.password)
+    if not ok:
         raise HTTPException(400, "Sai email hoặc mật khẩu")
 
+    # đổi BCRYPT_ROUNDS thì hash lại dần khi user đăng nhập, không bắt reset
+    if new_hash:
+        await _in_session(_set_password, user.id, new_hash)
+
     token = create_access_token({"sub": str(user.id)})
 
     return {
@@ -51,8 +112,11 @@ def set_fcm_token(
     if not payload.fcm_token:
         raise HTTPException(400, "Thiếu fcm_token")
 
+    # lưu theo thiết bị (nhiều máy / user), cột fcm_token giữ cho client cũ
+    register_device_token(db, current_user.id, payload.fcm_token)
     current_user.fcm_token = payload.fcm_token
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
 
     print("✅ Updated FCM token for:", current_user.email)
@@ -60,16 +124,14 @@ def set_fcm_token(
     return {"ok": True}
 
 @router.post("/forgot-password")
-def forgot_password(data: ForgotPasswordIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def forgot_password(data: ForgotPasswordIn):
+    user = await _in_session(_find_user_by_email, data.email)
     if not user:
         raise HTTPException(status_code=404, detail="Email không tồn tại")
 
     new_password = secrets.token_urlsafe(8)
 
-    user.password = hash_password(new_password)
-    db.commit()
-    db.refresh(user)
+    await _in_session(_set_password, user.id, await hash_password_async(new_password))
 
     subject = "Đặt lại mật khẩu - Money Manager"
     body = f"""
@@ -87,7 +149,7 @@ Trân trọng,
 Money Manager
 """
 
-    ok = send_email(user.email, subject, body)
+    ok = await run_in_threadpool(send_email, user.email, subject, body)
     if not ok:
         # tuỳ bạn, dev mode có thể trả new_password về luôn
         raise HTTPException(
@@ -97,14 +159,12 @@ Money Manager
 
     return {"detail": "Mật khẩu mới đã được gửi qua email của bạn."}
 
-@router.post("/change-password")
-def change_password(
-    data: ChangePasswordIn,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+async def _change_password(data: ChangePasswordIn, current_user: User):
     # 1. check mật khẩu hiện tại
-    if not verify_password(data.current_password, current_user.password):
+    password_hash = await _in_session(_password_hash, current_user.id)
+    if not password_hash or not await verify_password_async(
+        data.current_password, password_hash
+    ):
         raise HTTPException(status_code=400, detail="Mật khẩu hiện tại không đúng")
 
     # 2. validate mật khẩu mới
@@ -115,8 +175,42 @@ def change_password(
         )
 
     # 3. update DB
-    current_user.password = hash_password(data.new_password)
-    db.commit()
-    db.refresh(current_user)
+    await _in_session(
+        _set_password, current_user.id, await hash_password_async(data.new_password)
+    )
+
+    return {"detail": "Đổi mật khẩu thành công"}
+
 
-    return {"detail": "Đổi mật khẩu thành công"}
\ No newline at end of file
+@router.post("/change-password")
+async def change_password(
+    data: ChangePasswordIn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # trả connection của get_current_user về pool trước khi hash
+    await run_in_threadpool(db.close)
+    return await _change_password(data, current_user)
+
+
+# --------- route async (DB_MODE=async) ---------
+aio_router = APIRouter(prefix="/auth", tags=["Auth"])
+
+
+@aio_router.post("/set-fcm-token")
+async def set_fcm_token_async(
+    payload: FCMTokenIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: set_fcm_token(payload, session, current_user))
+
+
+@aio_router.post("/change-password")
+async def change_password_async(
+    data: ChangePasswordIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    await db.close()
+    return await _change_password(data, current_user)
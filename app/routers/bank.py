@@ -1,19 +1,32 @@
 # app/routers/bank.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 
-from app.database import get_db
-from app.services.auth import get_current_user
+from app.database import get_db, get_async_db
+from app.services.auth import get_current_user, get_current_user_async
+from app.export import export_response, export_response_async
 from app.models.bank_account import BankAccount
 from app.models.bank_transaction import BankTransaction
 from app.models.family_member import FamilyMember
-from app.models.user import User
-from app.notifications import send_notification_to_token
+from app.notifications import enqueue_notification
+from app.schemas.money import format_vnd
+from app.serialization import list_response, projection
+from app.services.bank_import import (
+    StatementImport,
+    import_statement,
+    iter_statement,
+    next_chunk,
+)
+from app.services.versions import bump_versions, check_etag, check_etag_async
 from app.schemas.bank import (
     BankAccountCreate,
     BankAccountOut,
+    BankImportResult,
     BankTransactionCreate,
     BankTransactionOut,
 )
@@ -22,18 +35,24 @@ router = APIRouter(prefix="/bank", tags=["Bank"])
 
 
 # --------- GET /bank/accounts  → list account ngân hàng của user ---------
+def list_bank_accounts_stmt(user_id):
+    return (
+        select(*projection(BankAccount, BankAccountOut))
+        .where(BankAccount.user_id == user_id)
+        .order_by(BankAccount.created_at.asc())
+    )
+
+
 @router.get("/accounts", response_model=list[BankAccountOut])
 def list_bank_accounts(
+    request: Request,
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    accounts = (
-        db.query(BankAccount)
-        .filter(BankAccount.user_id == user.id)
-        .order_by(BankAccount.created_at.asc())
-        .all()
+    headers = check_etag(db, request, user.id, "bank_accounts")
+    return list_response(
+        BankAccountOut, db.execute(list_bank_accounts_stmt(user.id)), headers=headers
     )
-    return accounts
 
 
 # --------- POST /bank/accounts  → tạo 1 account ngân hàng ---------
@@ -50,12 +69,35 @@ def create_bank_account(
         balance=payload.balance,
     )
     db.add(acc)
+    bump_versions(db, user.id, "bank_accounts")
     db.commit()
     db.refresh(acc)
     return acc
 
 
 # --------- GET /bank/accounts/{account_id}/transactions  → history ---------
+def owned_account_stmt(account_id, user_id):
+    return select(BankAccount.id).where(
+        BankAccount.id == account_id,
+        BankAccount.user_id == user_id,
+    )
+
+
+def _account_not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Tài khoản ngân hàng không tồn tại",
+    )
+
+
+def list_bank_transactions_stmt(account_id):
+    return (
+        select(*projection(BankTransaction, BankTransactionOut))
+        .where(BankTransaction.account_id == account_id)
+        .order_by(BankTransaction.date.desc(), BankTransaction.id.desc())
+    )
+
+
 @router.get(
     "/accounts/{account_id}/transactions",
     response_model=list[BankTransactionOut],
@@ -66,27 +108,42 @@ def list_bank_transactions(
     user=Depends(get_current_user),
 ):
     # check quyền sở hữu acc
-    acc = (
-        db.query(BankAccount)
-        .filter(
-            BankAccount.id == account_id,
-            BankAccount.user_id == user.id,
+    if not db.execute(owned_account_stmt(account_id, user.id)).scalar_one_or_none():
+        raise _account_not_found()
+
+    txs = db.execute(list_bank_transactions_stmt(account_id))
+    return list_response(BankTransactionOut, txs)
+
+
+# --------- GET /bank/accounts/{account_id}/export  → history, stream CSV / NDJSON ---------
+def export_bank_transactions_stmt(account_id):
+    return (
+        select(
+            BankTransaction.id,
+            BankTransaction.date,
+            BankTransaction.type,
+            BankTransaction.amount,
+            BankTransaction.description,
+            BankTransaction.balance_after,
         )
-        .first()
+        .where(BankTransaction.account_id == account_id)
+        .order_by(BankTransaction.date.desc(), BankTransaction.id.desc())
     )
-    if not acc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tài khoản ngân hàng không tồn tại",
-        )
 
-    txs = (
-        db.query(BankTransaction)
-        .filter(BankTransaction.account_id == account_id)
-        .order_by(BankTransaction.date.desc())
-        .all()
-    )
-    return txs
+
+@router.get("/accounts/{account_id}/export")
+def export_bank_transactions(
+    account_id: UUID,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    # check quyền trước khi bắt đầu stream (stream rồi thì không trả 404 được nữa)
+    if not db.execute(owned_account_stmt(account_id, user.id)).scalar_one_or_none():
+        raise _account_not_found()
+
+    stmt = export_bank_transactions_stmt(account_id)
+    return export_response(stmt, fmt, f"bank-{account_id}")
 
 
 # --------- POST /bank/accounts/{account_id}/transactions  → tạo giao dịch ---------
@@ -101,72 +158,224 @@ def create_bank_transaction(
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
+    # validate type
+    if payload.type not in ("income", "expense"):
+        raise HTTPException(400, "type phải là 'income' hoặc 'expense'")
+
+    # 1 câu SQL: cộng/trừ số dư ngay trong DB (không đọc ra Python rồi ghi lại ->
+    # không mất update khi nhiều request cùng ghi 1 account), check quyền sở hữu
+    # và insert giao dịch với balance_after vừa tính
+    delta = payload.amount if payload.type == "income" else -payload.amount
     acc = (
-        db.query(BankAccount)
-        .filter(
+        update(BankAccount)
+        .where(
             BankAccount.id == account_id,
             BankAccount.user_id == user.id,
         )
-        .first()
-    )
-    if not acc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tài khoản ngân hàng không tồn tại",
+        .values(
+            balance=func.coalesce(BankAccount.balance, 0) + delta,
+            updated_at=datetime.utcnow(),
         )
-
-    # validate type
-    if payload.type not in ("income", "expense"):
-        raise HTTPException(400, "type phải là 'income' hoặc 'expense'")
-
-    # cập nhật số dư
-    if payload.type == "income":
-        acc.balance = (acc.balance or 0) + payload.amount
-    else:
-        acc.balance = (acc.balance or 0) - payload.amount
-
-    tx = BankTransaction(
-        account_id=account_id,
-        type=payload.type,
-        amount=payload.amount,
-        description=payload.description,
-        date=payload.date or datetime.utcnow(),
-        balance_after=acc.balance,
+        .returning(BankAccount.id, BankAccount.balance)
+        .cte("acc")
     )
+    tx_id = uuid4()
+    tx = db.execute(
+        insert(BankTransaction)
+        .from_select(
+            ["id", "account_id", "type", "amount", "description", "date", "balance_after"],
+            select(
+                literal(tx_id, BankTransaction.id.type),
+                acc.c.id,
+                literal(payload.type),
+                literal(payload.amount, BankTransaction.amount.type),
+                literal(payload.description, BankTransaction.description.type),
+                literal(payload.date or datetime.utcnow(), BankTransaction.date.type),
+                acc.c.balance,
+            ),
+        )
+        .returning(
+            BankTransaction.id,
+            BankTransaction.account_id,
+            BankTransaction.type,
+            BankTransaction.amount,
+            BankTransaction.description,
+            BankTransaction.date,
+            BankTransaction.balance_after,
+        )
+    ).first()
 
-    db.add(tx)
-    db.commit()
-    db.refresh(tx)
-    db.refresh(acc)
+    if not tx:
+        raise _account_not_found()
 
-    # 🔔 GỬI FCM CHO CÁC OWNER ĐANG THEO DÕI USER NÀY
+    # 🔔 XẾP FCM VÀO OUTBOX CHO CÁC OWNER ĐANG THEO DÕI USER NÀY
     # user hiện tại = member, tìm các owner có gia đình với user này
-    links = (
-        db.query(FamilyMember, User)
-        .join(User, FamilyMember.owner_id == User.id)
-        .filter(
+    owner_ids = [
+        owner_id
+        for (owner_id,) in db.query(FamilyMember.owner_id).filter(
             FamilyMember.member_id == user.id,
             FamilyMember.status == "accepted",
         )
-        .all()
-    )
+    ]
 
     member_name = user.email.split("@")[0]
     action_word = "nhận" if tx.type == "income" else "chi"
-    amount_str = f"{int(tx.amount):,}đ".replace(",", ".")
-
-    for link, owner in links:
-        if getattr(owner, "fcm_token", None):
-            send_notification_to_token(
-                owner.fcm_token,
-                title="Giao dịch ngân hàng mới",
-                body=f"{member_name} vừa {action_word} {amount_str} qua ngân hàng",
-                data={
-                    "type": "bank_tx_changed",
-                    "member_id": str(user.id),
-                    "account_id": str(acc.id),
-                    "tx_id": str(tx.id),
-                },
+    amount_str = format_vnd(tx.amount)
+
+    enqueue_notification(
+        db,
+        owner_ids,
+        title="Giao dịch ngân hàng mới",
+        body=f"{member_name} vừa {action_word} {amount_str} qua ngân hàng",
+        data={
+            "type": "bank_tx_changed",
+            "member_id": str(user.id),
+            "account_id": str(tx.account_id),
+            "tx_id": str(tx.id),
+        },
+    )
+
+    # số dư account đổi -> ETag /bank/accounts đổi
+    bump_versions(db, user.id, "bank_accounts")
+    db.commit()
+    return tx
+
+
+# --------- POST /bank/accounts/{account_id}/import  → nhập sao kê CSV / NDJSON ---------
+def _statement_format(file: UploadFile, fmt: str | None) -> str:
+    if fmt is None:
+        name = (file.filename or "").lower()
+        fmt = "ndjson" if name.endswith((".ndjson", ".jsonl", ".json")) else "csv"
+    return fmt
+
+
+def _finish_import(db: Session, account_id: UUID, user, result: dict) -> dict:
+    # 1 notif tổng kết cho cả file, không phải mỗi dòng 1 notif
+    if result["imported"]:
+        owner_ids = [
+            owner_id
+            for (owner_id,) in db.query(FamilyMember.owner_id).filter(
+                FamilyMember.member_id == user.id,
+                FamilyMember.status == "accepted",
             )
+        ]
+        member_name = user.email.split("@")[0]
+        enqueue_notification(
+            db,
+            owner_ids,
+            title="Sao kê ngân hàng mới",
+            body=f"{member_name} vừa nhập {result['imported']} giao dịch ngân hàng",
+            data={
+                "type": "bank_tx_changed",
+                "member_id": str(user.id),
+                "account_id": str(account_id),
+                "imported": str(result["imported"]),
+            },
+        )
+        bump_versions(db, user.id, "bank_accounts")
+
+    db.commit()
+    return result
+
+
+@router.post("/accounts/{account_id}/import", response_model=BankImportResult)
+def import_bank_statement(
+    account_id: UUID,
+    file: UploadFile = File(...),
+    fmt: str | None = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    fmt = _statement_format(file, fmt)
+    result = import_statement(db, account_id, user.id, iter_statement(file.file, fmt))
+    return _finish_import(db, account_id, user, result)
+
+
+# --------- route async (DB_MODE=async) ---------
+aio_router = APIRouter(prefix="/bank", tags=["Bank"])
+
+
+@aio_router.get("/accounts", response_model=list[BankAccountOut])
+async def list_bank_accounts_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    headers = await check_etag_async(db, request, user.id, "bank_accounts")
+    return list_response(
+        BankAccountOut, await db.execute(list_bank_accounts_stmt(user.id)), headers=headers
+    )
+
+
+@aio_router.post("/accounts", response_model=BankAccountOut, status_code=status.HTTP_201_CREATED)
+async def create_bank_account_async(
+    payload: BankAccountCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: create_bank_account(payload, session, user))
+
+
+@aio_router.get(
+    "/accounts/{account_id}/transactions",
+    response_model=list[BankTransactionOut],
+)
+async def list_bank_transactions_async(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    if not (await db.execute(owned_account_stmt(account_id, user.id))).scalar_one_or_none():
+        raise _account_not_found()
+
+    txs = await db.execute(list_bank_transactions_stmt(account_id))
+    return list_response(BankTransactionOut, txs)
+
+
+@aio_router.get("/accounts/{account_id}/export")
+async def export_bank_transactions_async(
+    account_id: UUID,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    if not (await db.execute(owned_account_stmt(account_id, user.id))).scalar_one_or_none():
+        raise _account_not_found()
+
+    stmt = export_bank_transactions_stmt(account_id)
+    return export_response_async(stmt, fmt, f"bank-{account_id}")
+
 
-    return tx
\ No newline at end of file
+@aio_router.post(
+    "/accounts/{account_id}/transactions",
+    response_model=BankTransactionOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_bank_transaction_async(
+    account_id: UUID,
+    payload: BankTransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(
+        lambda session: create_bank_transaction(account_id, payload, session, user)
+    )
+
+
+@aio_router.post("/accounts/{account_id}/import", response_model=BankImportResult)
+async def import_bank_statement_async(
+    account_id: UUID,
+    file: UploadFile = File(...),
+    fmt: str | None = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    # đọc + parse file (CPU, I/O file tạm) trong threadpool từng lô, chỉ phần ghi
+    # DB của mỗi lô chạy qua run_sync -> event loop không bị chặn suốt cả file
+    rows = iter_statement(file.file, _statement_format(file, fmt))
+    job = StatementImport(account_id, user.id)
+    await db.run_sync(job.begin)
+    while chunk := await run_in_threadpool(next_chunk, rows):
+        await db.run_sync(job.add, chunk)
+    result = await db.run_sync(job.finish)
+    return await db.run_sync(_finish_import, account_id, user, result)
@@ -1,21 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.budget import Budget
-from app.schemas.budget import BudgetCreate, BudgetOut, BudgetUpdate
-from app.services.auth import get_current_user
+from app.schemas.budget import BudgetCreate, BudgetOut, BudgetProgressOut, BudgetUpdate
+from app.services.auth import get_current_user, get_current_user_async
+from app.services.budgets import budget_progress_rows, budget_progress_stmt, seed_budget_spend
+from app.services.versions import bump_versions, check_etag, check_etag_async
+from app.timezones import timezone_param
 
 router = APIRouter(prefix="/budgets", tags=["Budgets"])
 
 
-@router.get("/", response_model=list[BudgetOut])
+def _local_day(tz: str) -> str:
+    # sang ngày mới (kỳ day/month/year có thể đã qua) thì đã chi về 0 dù không
+    # có ghi nào -> ETag đổi theo ngày địa phương
+    return datetime.now(ZoneInfo(tz)).date().isoformat()
+
+
+# budget + đã chi / còn lại trong kỳ hiện tại, 1 câu SQL cho mọi budget
+@router.get("/", response_model=list[BudgetProgressOut])
 def list_budgets(
+    request: Request,
+    response: Response,
+    tz: str = Depends(timezone_param),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    return db.query(Budget).filter(Budget.user_id == user.id).all()
+    response.headers.update(check_etag(db, request, user.id, "budgets", _local_day(tz)))
+    return budget_progress_rows(db.execute(budget_progress_stmt(user.id, tz)))
 
 
 @router.post("/", response_model=BudgetOut)
@@ -26,6 +44,10 @@ def create_budget(
 ):
     new = Budget(user_id=user.id, **data.dict())
     db.add(new)
+    db.flush()
+    # bộ đếm kỳ hiện tại cho cảnh báo ngưỡng (services/budgets.py)
+    seed_budget_spend(db, budget_id=new.id)
+    bump_versions(db, user.id, "budgets")
     db.commit()
     db.refresh(new)
     return new
@@ -49,6 +71,10 @@ def update_budget(
     for key, value in data.dict(exclude_unset=True).items():
         setattr(budget, key, value)
 
+    # đổi amount / period / danh mục -> tính lại bộ đếm + mức cảnh báo
+    db.flush()
+    seed_budget_spend(db, budget_id=budget.id)
+    bump_versions(db, user.id, "budgets")
     db.commit()
     db.refresh(budget)
     return budget
@@ -64,5 +90,52 @@ def delete_budget(
         Budget.id == budget_id,
         Budget.user_id == user.id,
     ).delete()
+    bump_versions(db, user.id, "budgets")
     db.commit()
     return {"deleted": True}
+
+
+# --------- route async (DB_MODE=async) ---------
+aio_router = APIRouter(prefix="/budgets", tags=["Budgets"])
+
+
+@aio_router.get("/", response_model=list[BudgetProgressOut])
+async def list_budgets_async(
+    request: Request,
+    response: Response,
+    tz: str = Depends(timezone_param),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    response.headers.update(
+        await check_etag_async(db, request, user.id, "budgets", _local_day(tz))
+    )
+    return budget_progress_rows(await db.execute(budget_progress_stmt(user.id, tz)))
+
+
+@aio_router.post("/", response_model=BudgetOut)
+async def create_budget_async(
+    data: BudgetCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: create_budget(data, session, user))
+
+
+@aio_router.put("/{budget_id}", response_model=BudgetOut)
+async def update_budget_async(
+    budget_id: UUID,
+    data: BudgetUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: update_budget(budget_id, data, session, user))
+
+
+@aio_router.delete("/{budget_id}")
+async def delete_budget_async(
+    budget_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: delete_budget(budget_id, session, user))
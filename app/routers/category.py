@@ -1,36 +1,35 @@
 # app/routers/category.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.schemas.category import CategoryCreate, CategoryOut
 from app.models.category import Category
-from app.services.auth import get_current_user
+from app.models.transaction import Transaction
+from app.serialization import list_response, projection
+from app.services.auth import get_current_user, get_current_user_async
+from app.services.versions import bump_versions, check_etag, check_etag_async
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+def list_categories_stmt(user_id):
+    return (
+        select(*projection(Category, CategoryOut))
+        .where(Category.user_id == user_id)
+        .order_by(Category.created_at.desc())
+    )
+
+
 @router.get("/", response_model=list[CategoryOut])
 def list_categories(
+    request: Request,
     db: Session = Depends(get_db),
     user = Depends(get_current_user),
 ):
-    cats = (
-        db.query(Category)
-        .filter(Category.user_id == user.id)
-        .order_by(Category.created_at.desc())
-        .all()
-    )
-
-    # Trả list dict cho chắc
-    return [
-        {
-            "id": str(c.id),
-            "name": c.name,
-            "icon": c.icon,
-            "color": c.color,
-        }
-        for c in cats
-    ]
+    headers = check_etag(db, request, user.id, "categories")
+    return list_response(CategoryOut, db.execute(list_categories_stmt(user.id)), headers=headers)
 
 
 @router.post("/", response_model=CategoryOut, status_code=201)
@@ -45,16 +44,10 @@ def create_category(
         # **data.dict(),       # nếu bro vẫn xài pydantic v1
     )
     db.add(new)
+    bump_versions(db, user.id, "categories")
     db.commit()
     db.refresh(new)
-
-    # Trả dict thuần, tránh lỗi Pydantic-ORM
-    return {
-        "id": str(new.id),
-        "name": new.name,
-        "icon": new.icon,
-        "color": new.color,
-    }
+    return new
 
 
 @router.delete("/{cat_id}")
@@ -63,7 +56,17 @@ def delete_category(
     db: Session = Depends(get_db),
     user = Depends(get_current_user),
 ):
-    (
+    # tombstone (giao dịch đã xoá mềm) vẫn giữ FK tới danh mục -> bỏ liên kết trước
+    db.execute(
+        update(Transaction)
+        .where(
+            Transaction.category_id == cat_id,
+            Transaction.user_id == user.id,
+            Transaction.deleted_at.is_not(None),
+        )
+        .values(category_id=None)
+    )
+    deleted = (
         db.query(Category)
         .filter(
             Category.id == cat_id,
@@ -71,5 +74,39 @@ def delete_category(
         )
         .delete()
     )
+    if deleted:
+        bump_versions(db, user.id, "categories")
     db.commit()
     return {"deleted": True}
+
+
+# --------- route async (DB_MODE=async) ---------
+aio_router = APIRouter(prefix="/categories", tags=["Categories"])
+
+@aio_router.get("/", response_model=list[CategoryOut])
+async def list_categories_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user_async),
+):
+    headers = await check_etag_async(db, request, user.id, "categories")
+    result = await db.execute(list_categories_stmt(user.id))
+    return list_response(CategoryOut, result, headers=headers)
+
+
+@aio_router.post("/", response_model=CategoryOut, status_code=201)
+async def create_category_async(
+    data: CategoryCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: create_category(data, session, user))
+
+
+@aio_router.delete("/{cat_id}")
+async def delete_category_async(
+    cat_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: delete_category(cat_id, session, user))
@@ -1,93 +1,98 @@
 # app/routers/family.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, true
 from uuid import UUID
 
-from app.database import get_db
-from app.notifications import send_notification_to_token
-from firebase_admin import messaging
+from app.database import get_db, get_async_db
+from app.notifications import enqueue_notification
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_filter,
+    set_page_headers,
+)
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.wallet import Wallet
 from app.models.family_member import FamilyMember
+from app.models.user_totals import UserTotals
 from app.schemas.family_member import (
     FamilyAddRequest,
+    FamilyFeedItemOut,
     FamilyMemberOut,
     FamilyInvitationOut,
     FamilyJoinedOut,
 )
 from app.schemas.transaction import TransactionOut
-from app.services.auth import get_current_user
+from app.serialization import list_response, projection
+from app.services.auth import get_current_user, get_current_user_async
+from app.services.totals import get_totals
 
 router = APIRouter(prefix="/family", tags=["Family"])
 
 
 # --------- helper: tính tổng thu / chi của 1 user ---------
 def get_user_totals(db: Session, user_id: UUID):
-    q = (
-        db.query(
-            Transaction.type,
-            func.coalesce(func.sum(Transaction.amount), 0).label("total"),
-        )
-        .filter(Transaction.user_id == user_id)
-        .group_by(Transaction.type)
-    )
-
-    total_income = 0.0
-    total_expense = 0.0
-
-    for row in q:
-        if row.type == "income":
-            total_income = float(row.total or 0)
-        elif row.type == "expense":
-            total_expense = float(row.total or 0)
-
-    return total_income, total_expense
+    # đọc từ bảng user_totals (cộng dồn khi ghi giao dịch), không SUM lại lịch sử
+    return get_totals(db, user_id)
 
 
 # --------- helper: tính số dư hiện tại của ví user ---------
 def get_user_current_wallet_balance(
     db: Session,
     user_id: UUID,
-    total_income: float,
-    total_expense: float,
-) -> float:
+    total_income: int,
+    total_expense: int,
+) -> int:
     initial_balance = (
-        db.query(func.coalesce(func.sum(Wallet.balance), 0.0))
+        db.query(func.coalesce(func.sum(Wallet.balance), 0))
         .filter(Wallet.user_id == user_id)
         .scalar()
-        or 0.0
+        or 0
     )
-    current_wallet_balance = initial_balance + total_income - total_expense
-    return float(current_wallet_balance)
+    return initial_balance + total_income - total_expense
 
 
 # --------- GET /family ---------
-@router.get("/", response_model=list[FamilyMemberOut])
-def list_family(
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
-):
-    links = (
-        db.query(FamilyMember, User)
+def list_family_stmt(owner_id):
+    # tổng số dư ví ban đầu của từng member (subquery tương quan, vẫn 1 query)
+    wallet_total = (
+        select(func.coalesce(func.sum(Wallet.balance), 0))
+        .where(Wallet.user_id == FamilyMember.member_id)
+        .correlate(FamilyMember)
+        .scalar_subquery()
+    )
+
+    # 1 query cho cả nhóm: link + user + tổng thu/chi + ví, không N+1
+    return (
+        select(
+            FamilyMember,
+            User,
+            func.coalesce(UserTotals.total_income, 0).label("total_income"),
+            func.coalesce(UserTotals.total_expense, 0).label("total_expense"),
+            wallet_total.label("wallet_total"),
+        )
         .join(User, FamilyMember.member_id == User.id)
-        .filter(FamilyMember.owner_id == user.id)
-        .all()
+        .outerjoin(UserTotals, UserTotals.user_id == FamilyMember.member_id)
+        .where(FamilyMember.owner_id == owner_id)
     )
 
+
+def family_member_rows(rows) -> list[FamilyMemberOut]:
     result: list[FamilyMemberOut] = []
 
-    for link, member in links:
-        total_income = 0.0
-        total_expense = 0.0
-        total_wallet_balance = 0.0
+    for link, member, income, expense, wallet in rows:
+        total_income = 0
+        total_expense = 0
+        total_wallet_balance = 0
 
         if link.status == "accepted":
-            total_income, total_expense = get_user_totals(db, member.id)
-            total_wallet_balance = get_user_current_wallet_balance(
-                db, member.id, total_income, total_expense
-            )
+            total_income = income or 0
+            total_expense = expense or 0
+            total_wallet_balance = (wallet or 0) + total_income - total_expense
 
         display_name = (
             getattr(link, "display_name", None)
@@ -113,6 +118,14 @@ def list_family(
     return result
 
 
+@router.get("/", response_model=list[FamilyMemberOut])
+def list_family(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return family_member_rows(db.execute(list_family_stmt(user.id)))
+
+
 # --------- POST /family → gửi lời mời ---------
 @router.post("/", response_model=FamilyMemberOut)
 def add_family_member(
@@ -191,20 +204,20 @@ def add_family_member(
         group_name=group_name,   # 👈
     )
     db.add(link)
+
+    # xếp thông báo vào outbox, commit chung với link
+    owner_name = user.email.split("@")[0]
+    enqueue_notification(
+        db,
+        [member.id],
+        title="Lời mời tham gia nhóm",
+        body=f"{owner_name} vừa mời bạn vào nhóm chi tiêu: {group_name}",
+        data={"type": "family_invite"},
+    )
+
     db.commit()
     db.refresh(link)
 
-    # gửi thông báo nếu có token
-    if getattr(member, "fcm_token", None):
-        owner_name = user.email.split("@")[0]
-        send_notification_to_token(
-            member.fcm_token,
-            title="Lời mời tham gia nhóm",
-            body=f"{owner_name} vừa mời bạn vào nhóm chi tiêu: {group_name}",
-            data={"type": "family_invite"},
-        )
-    print("👉 member email:", member.email, "fcm_token:", member.fcm_token)
-
     return FamilyMemberOut(
         id=link.id,
         member_id=member.id,
@@ -218,21 +231,18 @@ def add_family_member(
     )
 
 # --------- GET /family/invitations ---------
-@router.get("/invitations", response_model=list[FamilyInvitationOut])
-def my_invitations(
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
-):
-    links = (
-        db.query(FamilyMember, User)
+def invitations_stmt(member_id):
+    return (
+        select(FamilyMember, User)
         .join(User, FamilyMember.owner_id == User.id)
-        .filter(
-            FamilyMember.member_id == user.id,
+        .where(
+            FamilyMember.member_id == member_id,
             FamilyMember.status == "pending",
         )
-        .all()
     )
 
+
+def invitation_rows(links) -> list[FamilyInvitationOut]:
     result: list[FamilyInvitationOut] = []
 
     for link, owner in links:
@@ -255,6 +265,14 @@ def my_invitations(
     return result
 
 
+@router.get("/invitations", response_model=list[FamilyInvitationOut])
+def my_invitations(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return invitation_rows(db.execute(invitations_stmt(user.id)))
+
+
 # --------- POST /family/{link_id}/accept ---------
 @router.post("/{link_id}/accept")
 def accept_family_invitation(
@@ -270,19 +288,17 @@ def accept_family_invitation(
         )
 
     link.status = "accepted"
-    db.commit()
-    db.refresh(link)
 
-    owner = db.query(User).filter(User.id == link.owner_id).first()
+    member_name = user.email.split("@")[0]
+    enqueue_notification(
+        db,
+        [link.owner_id],
+        title="Lời mời đã được chấp nhận",
+        body=f"{member_name} đã đồng ý tham gia nhóm của bạn",
+        data={"type": "family_invite_accepted"},
+    )
 
-    if owner and owner.fcm_token:
-        member_name = user.email.split("@")[0]
-        send_notification_to_token(
-            owner.fcm_token,
-            title="Lời mời đã được chấp nhận",
-            body=f"{member_name} đã đồng ý tham gia nhóm của bạn",
-            data={"type": "family_invite_accepted"},
-        )
+    db.commit()
 
     return {"status": "accepted"}
 
@@ -306,36 +322,96 @@ def reject_family_invitation(
     return {"status": "rejected"}
 
 
-# --------- GET /family/{member_id}/transactions ---------
-@router.get("/{member_id}/transactions", response_model=list[TransactionOut])
-def member_transactions(
-    member_id: UUID,
+# --------- GET /family/feed → giao dịch của cả nhóm, gộp theo ngày ---------
+def family_feed_stmt(owner_id, limit: int, before: str | None, after: str | None):
+    """
+    1 query cho cả nhóm: mỗi member accepted lấy tối đa limit + 1 dòng qua
+    LATERAL (đi ix_transactions_user_date_id_live, dừng sớm), rồi gộp lại và
+    cắt theo cùng keyset (date, id). Chi phí theo số member x limit, không
+    theo lịch sử giao dịch.
+    """
+    per_member = keyset_filter(
+        select(*projection(Transaction, TransactionOut)).where(
+            Transaction.user_id == FamilyMember.member_id,
+            Transaction.deleted_at.is_(None),
+        ),
+        Transaction.date,
+        Transaction.id,
+        limit,
+        before,
+        after,
+    ).lateral("member_tx")
+
+    date_col, id_col = per_member.c.date, per_member.c.id
+    order = (date_col.asc(), id_col.asc()) if after else (date_col.desc(), id_col.desc())
+
+    return (
+        select(
+            *[per_member.c[name] for name in TransactionOut.model_fields],
+            FamilyMember.member_id,
+            FamilyMember.display_name.label("member_display_name"),
+        )
+        .select_from(FamilyMember)
+        .join(per_member, true())
+        .where(
+            FamilyMember.owner_id == owner_id,
+            FamilyMember.status == "accepted",
+        )
+        .order_by(*order)
+        .limit(limit + 1)
+    )
+
+
+@router.get("/feed", response_model=list[FamilyFeedItemOut])
+def family_feed(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    link = (
-        db.query(FamilyMember)
-        .filter(
-            FamilyMember.owner_id == user.id,
-            FamilyMember.member_id == member_id,
-        )
-        .first()
+    # phân trang giống GET /transactions/: X-Next-Cursor → ?before=, X-Prev-Cursor → ?after=
+    stmt = family_feed_stmt(user.id, limit, before, after)
+    rows, has_more = finish_page(db.execute(stmt), limit, after)
+    response = list_response(FamilyFeedItemOut, rows)
+    set_page_headers(response, rows, has_more, before, after)
+    return response
+
+
+# --------- GET /family/{member_id}/transactions ---------
+def member_link_stmt(owner_id, member_id):
+    return select(FamilyMember.status).where(
+        FamilyMember.owner_id == owner_id,
+        FamilyMember.member_id == member_id,
     )
 
-    if not link or link.status != "accepted":
+
+def _require_accepted(link_status: str | None):
+    if link_status != "accepted":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Tài khoản này chưa xác nhận tham gia gia đình",
         )
 
-    txs = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == member_id)
-        .order_by(Transaction.date.desc())
-        .all()
+
+def member_transactions_stmt(member_id):
+    return (
+        select(*projection(Transaction, TransactionOut))
+        .where(Transaction.user_id == member_id, Transaction.deleted_at.is_(None))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
     )
 
-    return txs
+
+@router.get("/{member_id}/transactions", response_model=list[TransactionOut])
+def member_transactions(
+    member_id: UUID,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_accepted(db.execute(member_link_stmt(user.id, member_id)).scalar())
+
+    txs = db.execute(member_transactions_stmt(member_id))
+    return list_response(TransactionOut, txs)
 
 
 # --------- DELETE /family/{member_id} ---------
@@ -364,22 +440,19 @@ def remove_family_member(
     db.commit()
     return {"deleted": True}
 
-@router.get("/joined", response_model=list[FamilyJoinedOut])
-def my_joined_groups(
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
-):
-    links = (
-        db.query(FamilyMember, User)
+def joined_groups_stmt(member_id):
+    return (
+        select(FamilyMember, User)
         .join(User, FamilyMember.owner_id == User.id)
-        .filter(
-            FamilyMember.member_id == user.id,
+        .where(
+            FamilyMember.member_id == member_id,
             FamilyMember.status == "accepted",
         )
         .order_by(FamilyMember.created_at.asc())
-        .all()
     )
 
+
+def joined_group_rows(links) -> list[FamilyJoinedOut]:
     result: list[FamilyJoinedOut] = []
 
     for link, owner in links:
@@ -403,6 +476,14 @@ def my_joined_groups(
 
     return result
 
+
+@router.get("/joined", response_model=list[FamilyJoinedOut])
+def my_joined_groups(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return joined_group_rows(db.execute(joined_groups_stmt(user.id)))
+
 @router.post("/{link_id}/leave")
 def leave_family_group(
     link_id: UUID,
@@ -427,4 +508,105 @@ def leave_family_group(
 
     db.delete(link)
     db.commit()
-    return {"left": True}    
\ No newline at end of file
+    return {"left": True}    
+
+
+# --------- route async (DB_MODE=async) ---------
+# GET query thẳng bằng AsyncSession; route ghi chạy lại thân hàm sync qua run_sync
+aio_router = APIRouter(prefix="/family", tags=["Family"])
+
+
+@aio_router.get("/", response_model=list[FamilyMemberOut])
+async def list_family_async(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return family_member_rows(await db.execute(list_family_stmt(user.id)))
+
+
+@aio_router.post("/", response_model=FamilyMemberOut)
+async def add_family_member_async(
+    payload: FamilyAddRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: add_family_member(payload, session, user))
+
+
+@aio_router.get("/invitations", response_model=list[FamilyInvitationOut])
+async def my_invitations_async(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return invitation_rows(await db.execute(invitations_stmt(user.id)))
+
+
+@aio_router.post("/{link_id}/accept")
+async def accept_family_invitation_async(
+    link_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: accept_family_invitation(link_id, session, user))
+
+
+@aio_router.post("/{link_id}/reject")
+async def reject_family_invitation_async(
+    link_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: reject_family_invitation(link_id, session, user))
+
+
+@aio_router.get("/feed", response_model=list[FamilyFeedItemOut])
+async def family_feed_async(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    stmt = family_feed_stmt(user.id, limit, before, after)
+    rows, has_more = finish_page(await db.execute(stmt), limit, after)
+    response = list_response(FamilyFeedItemOut, rows)
+    set_page_headers(response, rows, has_more, before, after)
+    return response
+
+
+@aio_router.get("/{member_id}/transactions", response_model=list[TransactionOut])
+async def member_transactions_async(
+    member_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    _require_accepted((await db.execute(member_link_stmt(user.id, member_id))).scalar())
+
+    txs = await db.execute(member_transactions_stmt(member_id))
+    return list_response(TransactionOut, txs)
+
+
+@aio_router.delete("/{member_id}")
+async def remove_family_member_async(
+    member_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: remove_family_member(member_id, session, user))
+
+
+@aio_router.get("/joined", response_model=list[FamilyJoinedOut])
+async def my_joined_groups_async(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return joined_group_rows(await db.execute(joined_groups_stmt(user.id)))
+
+
+@aio_router.post("/{link_id}/leave")
+async def leave_family_group_async(
+    link_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: leave_family_group(link_id, session, user))
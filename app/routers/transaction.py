@@ -1,14 +1,44 @@
 # app/routers/transaction.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import DateTime, cast, func, null, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
-from app.database import get_db
+from datetime import date, datetime
+from uuid import UUID
+from app.database import get_db, get_async_db
+from app.export import export_response, export_response_async
+from app.models.category import Category
+from app.models.daily_rollup import DailyRollup
 from app.models.transaction import Transaction
 from app.models.user import User
 from app.models.family_member import FamilyMember
-from app.schemas.transaction import TransactionCreate, TransactionOut
-from app.services.auth import get_current_user
-from app.notifications import send_notification_to_token  # 👈 dùng FCM
+from app.schemas.money import format_vnd
+from app.schemas.transaction import (
+    TransactionChanges,
+    TransactionCreate,
+    TransactionOut,
+    TransactionSummaryRow,
+)
+from app.serialization import list_response, projection
+from app.services.auth import get_current_user, get_current_user_async
+from app.notifications import enqueue_notification  # 👈 dùng FCM qua outbox
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_SYNC_SIZE,
+    MAX_PAGE_SIZE,
+    MAX_SYNC_SIZE,
+    decode_sync_token,
+    encode_sync_token,
+    finish_page,
+    keyset_filter,
+    set_page_headers,
+)
+from app.services.budgets import apply_budget_spend
+from app.services.rollups import apply_rollup, rollup_range
+from app.services.tombstones import check_sync_token, purged_horizon_stmt
+from app.services.totals import apply_transaction
+from app.services.versions import bump_versions, check_etag, check_etag_async
+from app.timezones import timezone_param
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
@@ -20,25 +50,22 @@ def notify_family_new_transaction(
     tx: Transaction,
 ):
     """
-    Gửi FCM cho tất cả owner đã link với user này (status = accepted)
-    khi user thêm 1 giao dịch mới.
+    Xếp FCM vào outbox cho tất cả owner đã link với user này (status = accepted)
+    khi user thêm 1 giao dịch mới. Gọi TRƯỚC commit để đi chung transaction.
     """
     # tìm tất cả owner đã liên kết mình (mình là member_id)
-    links = (
-        db.query(FamilyMember, User)
-        .join(User, FamilyMember.owner_id == User.id)
-        .filter(
+    owner_ids = [
+        owner_id
+        for (owner_id,) in db.query(FamilyMember.owner_id).filter(
             FamilyMember.member_id == member_user.id,
             FamilyMember.status == "accepted",
         )
-        .all()
-    )
+    ]
 
-    if not links:
+    if not owner_ids:
         return
 
     tx_type_vi = "khoản thu" if tx.type == "income" else "khoản chi"
-    amount = int(tx.amount or 0)
 
     member_name = (
         getattr(member_user, "full_name", None)
@@ -46,39 +73,261 @@ def notify_family_new_transaction(
         or member_user.email.split("@")[0]
     )
 
-    for link, owner in links:
-        # owner là user "chủ nhóm"
-        token = getattr(owner, "fcm_token", None)
-        if not token:
-          continue
-
-        body = f"{member_name} vừa thêm {tx_type_vi} {amount:,.0f}đ"
-
-        send_notification_to_token(
-            token,
-            title="Giao dịch mới trong nhóm",
-            body=body,
-            data={
-                "type": "family_tx",
-                "member_id": str(member_user.id),
-                "tx_id": str(tx.id),
-                "tx_type": tx.type,
-            },
-        )
+    body = f"{member_name} vừa thêm {tx_type_vi} {format_vnd(tx.amount)}"
+
+    enqueue_notification(
+        db,
+        owner_ids,
+        title="Giao dịch mới trong nhóm",
+        body=body,
+        data={
+            "type": "family_tx",
+            "member_id": str(member_user.id),
+            "tx_id": str(tx.id),
+            "tx_type": tx.type,
+        },
+    )
+
+
+# --------- list giao dịch của chính mình (phân trang theo cursor) ---------
+def list_transactions_stmt(
+    user_id,
+    limit: int,
+    before: str | None,
+    after: str | None,
+    date_from: datetime | None,
+    date_to: datetime | None,
+):
+    stmt = select(*projection(Transaction, TransactionOut)).where(
+        Transaction.user_id == user_id,
+        Transaction.deleted_at.is_(None),
+    )
+
+    # khoảng ngày: from <= date < to
+    if date_from:
+        stmt = stmt.where(Transaction.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Transaction.date < date_to)
+
+    return keyset_filter(stmt, Transaction.date, Transaction.id, limit, before, after)
 
 
-# --------- list giao dịch của chính mình ---------
 @router.get("/", response_model=list[TransactionOut])
 def list_transactions(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    return (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user.id)
-        .order_by(Transaction.date.desc())
-        .all()
+    headers = check_etag(db, request, user.id, "transactions")
+    stmt = list_transactions_stmt(user.id, limit, before, after, date_from, date_to)
+    rows, has_more = finish_page(db.execute(stmt), limit, after)
+    response = list_response(TransactionOut, rows, headers=headers)
+    set_page_headers(response, rows, has_more, before, after)
+    return response
+
+
+# --------- GET /transactions/changes  → delta sync theo token ---------
+def transaction_changes_stmt(user_id, since: str | None, limit: int):
+    """
+    Các dòng thêm / sửa / xoá sau token, theo (change_seq, id) tăng dần.
+    Không có token = sync lần đầu: chỉ lấy dòng còn sống, chưa cần tombstone.
+    Token cũ hơn mốc purge-tombstones -> 410, client sync lại từ đầu.
+    Đọc qua ix_transactions_user_change_seq: chi phí theo số thay đổi, không theo lịch sử.
+    """
+    stmt = select(
+        *projection(Transaction, TransactionOut),
+        Transaction.deleted_at,
+        Transaction.change_seq,
+    ).where(Transaction.user_id == user_id)
+
+    if since:
+        seq, row_id = decode_sync_token(since)
+        stmt = stmt.where(tuple_(Transaction.change_seq, Transaction.id) > tuple_(seq, row_id))
+    else:
+        stmt = stmt.where(Transaction.deleted_at.is_(None))
+
+    return stmt.order_by(Transaction.change_seq.asc(), Transaction.id.asc()).limit(limit + 1)
+
+
+def transaction_changes(rows, limit: int, since: str | None) -> TransactionChanges:
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if rows:
+        next_since = encode_sync_token(rows[-1].change_seq, rows[-1].id)
+    else:
+        # chưa có gì: token "từ đầu", lần sau nhận cả tombstone
+        next_since = since or encode_sync_token(0, UUID(int=0))
+
+    return TransactionChanges(
+        changes=[row for row in rows if row.deleted_at is None],
+        deleted=[row.id for row in rows if row.deleted_at is not None],
+        next_since=next_since,
+        has_more=has_more,
+    )
+
+
+@router.get("/changes", response_model=TransactionChanges)
+def transaction_changes_since(
+    since: str | None = None,
+    limit: int = Query(DEFAULT_SYNC_SIZE, ge=1, le=MAX_SYNC_SIZE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    rows = db.execute(transaction_changes_stmt(user.id, since, limit)).all()
+    if since:
+        # đọc mốc dọn tombstone SAU khi đọc dòng: purge chen giữa thì 410 thừa, không lỡ lần xoá
+        horizon = db.execute(purged_horizon_stmt(user.id)).scalar()
+        check_sync_token(decode_sync_token(since)[0], horizon)
+    return transaction_changes(rows, limit, since)
+
+
+# --------- GET /transactions/export  → toàn bộ lịch sử, stream CSV / NDJSON ---------
+def export_transactions_stmt(user_id, date_from: datetime | None, date_to: datetime | None):
+    stmt = (
+        select(
+            Transaction.id,
+            Transaction.date,
+            Transaction.type,
+            Transaction.amount,
+            Category.name.label("category"),
+            Transaction.note,
+        )
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(Transaction.user_id == user_id, Transaction.deleted_at.is_(None))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
     )
+    if date_from:
+        stmt = stmt.where(Transaction.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Transaction.date < date_to)
+    return stmt
+
+
+@router.get("/export")
+def export_transactions(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    user=Depends(get_current_user),
+):
+    stmt = export_transactions_stmt(user.id, date_from, date_to)
+    return export_response(stmt, fmt, "transactions")
+
+
+# --------- GET /transactions/summary  → tổng thu / chi theo danh mục hoặc theo kỳ ---------
+def rollup_summary_stmt(user_id, group_by: str, day_from: date | None, day_to: date | None):
+    """
+    Đọc từ daily_rollups: tối đa số ngày x số danh mục dòng, không theo số giao dịch
+    """
+    income = func.coalesce(func.sum(DailyRollup.amount).filter(DailyRollup.type == "income"), 0)
+    expense = func.coalesce(func.sum(DailyRollup.amount).filter(DailyRollup.type == "expense"), 0)
+    count = func.coalesce(func.sum(DailyRollup.tx_count), 0)
+
+    if group_by == "category":
+        stmt = (
+            select(DailyRollup.category_id, Category.name, income, expense, count)
+            .outerjoin(Category, Category.id == DailyRollup.category_id)
+            .group_by(DailyRollup.category_id, Category.name)
+            .order_by(expense.desc())
+        )
+    else:
+        # day là ngày địa phương sẵn rồi, cắt kỳ thẳng (ép timestamp không múi giờ)
+        bucket = func.date_trunc(group_by, cast(DailyRollup.day, DateTime))
+        stmt = (
+            select(bucket, null(), income, expense, count)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+    # dòng về 0 sau khi sửa / xoá giao dịch vẫn còn trong bảng, bỏ khỏi kết quả
+    stmt = stmt.where(DailyRollup.user_id == user_id).having(count > 0)
+    if day_from:
+        stmt = stmt.where(DailyRollup.day >= day_from)
+    if day_to:
+        stmt = stmt.where(DailyRollup.day < day_to)
+    return stmt
+
+
+def raw_summary_stmt(
+    user_id,
+    group_by: str,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    tz: str,
+):
+    income = func.coalesce(func.sum(Transaction.amount).filter(Transaction.type == "income"), 0)
+    expense = func.coalesce(func.sum(Transaction.amount).filter(Transaction.type == "expense"), 0)
+    count = func.count()
+
+    if group_by == "category":
+        stmt = (
+            select(Transaction.category_id, Category.name, income, expense, count)
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .group_by(Transaction.category_id, Category.name)
+            .order_by(expense.desc())
+        )
+    else:
+        # đổi sang giờ địa phương rồi mới cắt kỳ, không thì giao dịch 0h-7h sáng rơi sang hôm trước
+        bucket = func.date_trunc(group_by, func.timezone(tz, Transaction.date))
+        stmt = (
+            select(bucket, null(), income, expense, count)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+    stmt = stmt.where(Transaction.user_id == user_id, Transaction.deleted_at.is_(None))
+    if date_from:
+        stmt = stmt.where(Transaction.date >= date_from)
+    if date_to:
+        stmt = stmt.where(Transaction.date < date_to)
+    return stmt
+
+
+def summary_stmt(
+    user_id,
+    group_by: str,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    tz: str,
+):
+    # tz mặc định + mốc tròn ngày (hoặc không lọc) -> đọc rollup, còn lại quét transactions
+    days = rollup_range(date_from, date_to, tz)
+    if days is not None:
+        return rollup_summary_stmt(user_id, group_by, *days)
+    return raw_summary_stmt(user_id, group_by, date_from, date_to, tz)
+
+
+def summary_rows(rows, group_by: str) -> list[TransactionSummaryRow]:
+    return [
+        TransactionSummaryRow(
+            key=(str(key) if group_by == "category" else key.date().isoformat()) if key else None,
+            label=label,
+            income=row_income,
+            expense=row_expense,
+            count=row_count,
+        )
+        for key, label, row_income, row_expense, row_count in rows
+    ]
+
+
+@router.get("/summary", response_model=list[TransactionSummaryRow])
+def transaction_summary(
+    group_by: str = Query("category", pattern="^(category|day|week|month)$"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    tz: str = Depends(timezone_param),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    stmt = summary_stmt(user.id, group_by, date_from, date_to, tz)
+    return summary_rows(db.execute(stmt), group_by)
 
 
 # --------- tạo giao dịch ---------
@@ -88,28 +337,63 @@ def create_tx(
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    new = Transaction(user_id=user.id, **data.dict())
+    # khoá version trước mọi thứ khác: change_seq của user tăng đúng thứ tự commit
+    # đã chi của budget đổi theo -> ETag /budgets cũng đổi
+    versions = bump_versions(db, user.id, "transactions", "budgets")
+
+    new = Transaction(user_id=user.id, change_seq=versions["transactions"], **data.dict())
     db.add(new)
-    db.commit()
-    db.refresh(new)
+    db.flush()  # lấy new.id cho notif
+    apply_transaction(db, user.id, new.type, new.amount)
+    apply_rollup(db, user.id, new.category_id, new.type, data.date, new.amount)
+    if new.type == "expense":
+        apply_budget_spend(db, user.id, new.category_id, data.date, new.amount)
 
-    # ⭐ gọi notify sau khi create
+    # ⭐ notif ghi vào outbox, commit chung với giao dịch
     notify_family_new_transaction(db, user, new)
 
+    db.commit()
+    db.refresh(new)
     return new
 
 
-# --------- xoá giao dịch ---------
+# --------- xoá giao dịch (xoá mềm, giữ tombstone cho /changes) ---------
 @router.delete("/{tx_id}")
 def delete_tx(
     tx_id: str,
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    db.query(Transaction).filter(
-        Transaction.id == tx_id,
-        Transaction.user_id == user.id,
-    ).delete()
+    versions = bump_versions(db, user.id, "transactions", "budgets")
+    deleted = db.execute(
+        update(Transaction)
+        .where(
+            Transaction.id == tx_id,
+            Transaction.user_id == user.id,
+            Transaction.deleted_at.is_(None),
+        )
+        .values(
+            deleted_at=func.now(),
+            updated_at=func.now(),
+            change_seq=versions["transactions"],
+        )
+        .returning(Transaction.type, Transaction.amount, Transaction.category_id, Transaction.date)
+    ).first()
+
+    if not deleted:
+        # không có dòng nào bị xoá: bỏ luôn lần tăng version, ETag giữ nguyên
+        db.rollback()
+        return {"deleted": True}
+
+    apply_transaction(db, user.id, deleted.type, deleted.amount, sign=-1)
+    apply_rollup(
+        db, user.id, deleted.category_id, deleted.type, deleted.date, deleted.amount, sign=-1
+    )
+    if deleted.type == "expense":
+        apply_budget_spend(
+            db, user.id, deleted.category_id, deleted.date, deleted.amount, sign=-1
+        )
+
     db.commit()
     return {"deleted": True}
 
@@ -120,14 +404,25 @@ def update_tx(
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
+    versions = bump_versions(db, user.id, "transactions", "budgets")
     tx = (
         db.query(Transaction)
-        .filter(Transaction.id == tx_id, Transaction.user_id == user.id)
+        .filter(
+            Transaction.id == tx_id,
+            Transaction.user_id == user.id,
+            Transaction.deleted_at.is_(None),
+        )
         .first()
     )
     if not tx:
         raise HTTPException(status_code=404, detail="Not found")
 
+    # trừ giá trị cũ khỏi tổng, lát cộng lại giá trị mới
+    apply_transaction(db, user.id, tx.type, tx.amount, sign=-1)
+    apply_rollup(db, user.id, tx.category_id, tx.type, tx.date, tx.amount, sign=-1)
+    if tx.type == "expense":
+        apply_budget_spend(db, user.id, tx.category_id, tx.date, tx.amount, sign=-1)
+
     # update fields
     tx.type = data.type
     tx.amount = data.amount
@@ -137,8 +432,106 @@ def update_tx(
     if hasattr(data, "date") and data.date:
         tx.date = data.date
 
-    tx.updated_at = datetime.utcnow()
+    # updated_at: onupdate=func.now()
+    tx.change_seq = versions["transactions"]
+
+    apply_transaction(db, user.id, tx.type, tx.amount)
+    apply_rollup(db, user.id, tx.category_id, tx.type, tx.date, tx.amount)
+    if tx.type == "expense":
+        apply_budget_spend(db, user.id, tx.category_id, tx.date, tx.amount)
 
     db.commit()
     db.refresh(tx)
-    return tx
\ No newline at end of file
+    return tx
+
+
+# --------- route async (DB_MODE=async) ---------
+# GET query thẳng bằng AsyncSession; route ghi chạy lại đúng thân hàm sync qua
+# run_sync (greenlet trên connection asyncpg, không chiếm thread nào)
+aio_router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+
+@aio_router.get("/", response_model=list[TransactionOut])
+async def list_transactions_async(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    headers = await check_etag_async(db, request, user.id, "transactions")
+    stmt = list_transactions_stmt(user.id, limit, before, after, date_from, date_to)
+    result = await db.execute(stmt)
+    rows, has_more = finish_page(result, limit, after)
+    response = list_response(TransactionOut, rows, headers=headers)
+    set_page_headers(response, rows, has_more, before, after)
+    return response
+
+
+@aio_router.get("/changes", response_model=TransactionChanges)
+async def transaction_changes_since_async(
+    since: str | None = None,
+    limit: int = Query(DEFAULT_SYNC_SIZE, ge=1, le=MAX_SYNC_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    rows = (await db.execute(transaction_changes_stmt(user.id, since, limit))).all()
+    if since:
+        horizon = (await db.execute(purged_horizon_stmt(user.id))).scalar()
+        check_sync_token(decode_sync_token(since)[0], horizon)
+    return transaction_changes(rows, limit, since)
+
+
+@aio_router.get("/export")
+async def export_transactions_async(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    user=Depends(get_current_user_async),
+):
+    stmt = export_transactions_stmt(user.id, date_from, date_to)
+    return export_response_async(stmt, fmt, "transactions")
+
+
+@aio_router.get("/summary", response_model=list[TransactionSummaryRow])
+async def transaction_summary_async(
+    group_by: str = Query("category", pattern="^(category|day|week|month)$"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    tz: str = Depends(timezone_param),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    stmt = summary_stmt(user.id, group_by, date_from, date_to, tz)
+    return summary_rows(await db.execute(stmt), group_by)
+
+
+@aio_router.post("/", response_model=TransactionOut)
+async def create_tx_async(
+    data: TransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: create_tx(data, session, user))
+
+
+@aio_router.delete("/{tx_id}")
+async def delete_tx_async(
+    tx_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: delete_tx(tx_id, session, user))
+
+
+@aio_router.put("/{tx_id}", response_model=TransactionOut)
+async def update_tx_async(
+    tx_id: str,
+    data: TransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
+):
+    return await db.run_sync(lambda session: update_tx(tx_id, data, session, user))
@@ -1,21 +1,30 @@
 # router/wallet.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.wallet import Wallet
 from app.schemas.wallet import WalletCreate, WalletOut
-from app.services.auth import get_current_user
+from app.serialization import list_response, projection
+from app.services.auth import get_current_user, get_current_user_async
+from app.services.versions import bump_versions, check_etag, check_etag_async
 
 router = APIRouter(prefix="/wallets", tags=["Wallets"])
 
+def list_wallets_stmt(user_id):
+    return select(*projection(Wallet, WalletOut)).where(Wallet.user_id == user_id)
+
 @router.get("/", response_model=list[WalletOut])
-def list_wallets(db: Session = Depends(get_db), user = Depends(get_current_user)):
-    return db.query(Wallet).filter(Wallet.user_id == user.id).all()
+def list_wallets(request: Request, db: Session = Depends(get_db), user = Depends(get_current_user)):
+    headers = check_etag(db, request, user.id, "wallets")
+    return list_response(WalletOut, db.execute(list_wallets_stmt(user.id)), headers=headers)
 
 @router.post("/", response_model=WalletOut, status_code=status.HTTP_201_CREATED)
 def create_wallet(data: WalletCreate, db: Session = Depends(get_db), user = Depends(get_current_user)):
     new = Wallet(user_id=user.id, **data.dict())
     db.add(new)
+    bump_versions(db, user.id, "wallets")
     db.commit()
     db.refresh(new)
     return new
@@ -32,7 +41,25 @@ def update_wallet(wallet_id: str, data: WalletCreate, db: Session = Depends(get_
         setattr(wallet, k, v)
 
     db.add(wallet)
+    bump_versions(db, user.id, "wallets")
     db.commit()
     db.refresh(wallet)
 
     return wallet
+
+
+# --------- route async (DB_MODE=async) ---------
+aio_router = APIRouter(prefix="/wallets", tags=["Wallets"])
+
+@aio_router.get("/", response_model=list[WalletOut])
+async def list_wallets_async(request: Request, db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user_async)):
+    headers = await check_etag_async(db, request, user.id, "wallets")
+    return list_response(WalletOut, await db.execute(list_wallets_stmt(user.id)), headers=headers)
+
+@aio_router.post("/", response_model=WalletOut, status_code=status.HTTP_201_CREATED)
+async def create_wallet_async(data: WalletCreate, db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user_async)):
+    return await db.run_sync(lambda session: create_wallet(data, session, user))
+
+@aio_router.put("/{wallet_id}", response_model=WalletOut)
+async def update_wallet_async(wallet_id: str, data: WalletCreate, db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user_async)):
+    return await db.run_sync(lambda session: update_wallet(wallet_id, data, session, user))
@@ -1,15 +1,17 @@
 # app/schemas/bank.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
 
+from app.schemas.money import Money
+
 
 # --------- BANK ACCOUNT ---------
 class BankAccountBase(BaseModel):
     bank_name: str
     account_number: str
-    balance: float = 0.0
+    balance: Money = 0
 
 
 class BankAccountCreate(BankAccountBase):
@@ -19,14 +21,13 @@ class BankAccountCreate(BankAccountBase):
 class BankAccountOut(BankAccountBase):
     id: UUID
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # --------- BANK TRANSACTION ---------
 class BankTransactionBase(BaseModel):
     type: str           # 'income' hoặc 'expense'
-    amount: float
+    amount: Money
     description: Optional[str] = None
     date: Optional[datetime] = None
 
@@ -38,7 +39,16 @@ class BankTransactionCreate(BankTransactionBase):
 class BankTransactionOut(BankTransactionBase):
     id: UUID
     account_id: UUID
-    balance_after: Optional[float] = None
+    balance_after: Optional[Money] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+
+# --------- IMPORT SAO KÊ ---------
+class BankImportResult(BaseModel):
+    account_id: UUID
+    imported: int
+    duplicates: int
+    total_income: Money
+    total_expense: Money
+    balance: Money
@@ -1,11 +1,14 @@
 # schemas/budget.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from typing import Optional
+from datetime import datetime
+
+from app.schemas.money import Money
 
 
 class BudgetBase(BaseModel):
-    amount: float
+    amount: Money
     period: str  # day / month / year
     type: str    # overall / category
     category_id: UUID | None = None
@@ -17,7 +20,7 @@ class BudgetCreate(BudgetBase):
 
 
 class BudgetUpdate(BaseModel):
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
     period: Optional[str] = None        # day / month / year
     type: Optional[str] = None          # overall / category
     category_id: Optional[UUID] = None
@@ -27,6 +30,10 @@ class BudgetUpdate(BaseModel):
 class BudgetOut(BudgetBase):
     id: UUID
 
-    class Config:
-        orm_mode = True
-        # from_attributes = True  # nếu dùng Pydantic v2
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BudgetProgressOut(BudgetOut):
+    spent: Money = 0          # đã chi trong kỳ hiện tại
+    remaining: Money = 0      # amount - spent (âm = vượt ngân sách)
+    period_start: datetime | None = None
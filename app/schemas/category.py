@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from uuid import UUID
 
 class CategoryBase(BaseModel):
     name: str
@@ -9,6 +10,5 @@ class CategoryCreate(CategoryBase):
     pass
 
 class CategoryOut(CategoryBase):
-    id: str
-    class Config:
-        orm_mode = True
+    id: UUID
+    model_config = ConfigDict(from_attributes=True)
@@ -1,9 +1,12 @@
 # app/schemas/family_member.py
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
 
+from app.schemas.money import Money
+from app.schemas.transaction import TransactionOut
+
 
 class FamilyAddRequest(BaseModel):
     email: EmailStr
@@ -16,14 +19,13 @@ class FamilyMemberOut(BaseModel):
     member_id: UUID
     email: str
     display_name: str | None = None
-    total_income: float = 0
-    total_expense: float = 0
-    total_wallet_balance: float = 0
+    total_income: Money = 0
+    total_expense: Money = 0
+    total_wallet_balance: Money = 0
     status: str = "accepted"   # ✅ thêm
     group_name: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ✅ schema riêng cho lời mời (bên người ĐƯỢC mời nhìn thấy)
@@ -35,8 +37,7 @@ class FamilyInvitationOut(BaseModel):
     status: str
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FamilyJoinedOut(BaseModel):
     id: UUID                  # id của link (family_member.id)
@@ -47,5 +48,10 @@ class FamilyJoinedOut(BaseModel):
     status: str
     created_at: datetime
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# 1 dòng của GET /family/feed: giao dịch + member đã tạo ra nó
+class FamilyFeedItemOut(TransactionOut):
+    member_id: UUID
+    member_display_name: str | None = None
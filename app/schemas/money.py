@@ -0,0 +1,35 @@
+# app/schemas/money.py
+"""
+Tiền lưu BIGINT theo đơn vị nhỏ nhất (minor unit). VND không có xu nên
+đơn vị nhỏ nhất = 1 đồng: giá trị API = giá trị trong DB, cộng/SUM chính xác.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import Annotated
+
+from pydantic import BeforeValidator
+
+
+def to_minor_units(value) -> int:
+    """
+    Nhận int / float / str từ client, trả về số nguyên đồng.
+    Có phần lẻ thì báo lỗi thay vì làm tròn ngầm.
+    """
+    if isinstance(value, bool):
+        raise ValueError("Số tiền không hợp lệ")
+    if isinstance(value, int):
+        return value
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError("Số tiền không hợp lệ")
+    if not amount.is_finite() or amount != amount.to_integral_value():
+        raise ValueError("Số tiền phải là số nguyên đồng")
+    return int(amount)
+
+
+def format_vnd(amount) -> str:
+    # 1234567 -> "1.234.567đ"
+    return f"{int(amount or 0):,}đ".replace(",", ".")
+
+
+Money = Annotated[int, BeforeValidator(to_minor_units)]
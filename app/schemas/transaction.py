@@ -1,10 +1,13 @@
 # schema/transaction.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
+
+from app.schemas.money import Money
+
 class TransactionBase(BaseModel):
     type: str  # income / expense
-    amount: float
+    amount: Money
     note: str | None = None
     category_id: UUID | None = None  # 🔥 sửa lại
     date: datetime | None = None
@@ -14,6 +17,23 @@ class TransactionCreate(TransactionBase):
 
 class TransactionOut(TransactionBase):
     id: UUID  # 🔥 sửa lại
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionSummaryRow(BaseModel):
+    # group_by=category: id danh mục (None = chưa phân loại)
+    # group_by=day/week/month: ngày đầu kỳ (YYYY-MM-DD) theo múi giờ tz
+    key: str | None = None
+    label: str | None = None
+    income: Money = 0
+    expense: Money = 0
+    count: int = 0
+
 
-    class Config:
-        orm_mode = True
+class TransactionChanges(BaseModel):
+    changes: list[TransactionOut] = []   # thêm mới / đã sửa kể từ token
+    deleted: list[UUID] = []             # id đã xoá (tombstone)
+    next_since: str                      # gửi lại ở ?since= lần sau
+    has_more: bool = False               # còn thay đổi, gọi tiếp ngay với next_since
@@ -1,9 +1,11 @@
 # schema/wallet.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID  # 👈 thêm cái này
 
+from app.schemas.money import Money
+
 class WalletBase(BaseModel):
-    balance: float
+    balance: Money
 
 class WalletCreate(WalletBase):
     pass
@@ -11,7 +13,4 @@ class WalletCreate(WalletBase):
 class WalletOut(WalletBase):
     id: UUID  # 👈 trước là str, đổi sang UUID
 
-    class Config:
-        orm_mode = True
-        # nếu dùng Pydantic v2 thì nên:
-        # from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,16 +1,102 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = default: hash có cost khác BCRYPT_ROUNDS sẽ bị đánh dấu cần hash lại
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def hash_password(password: str):
+# bcrypt chạy trên process pool riêng, route async chỉ await future:
+# không chiếm thread nào của threadpool, không giữ connection DB trong lúc hash
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_slots = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def _run(fn, *args):
+    """
+    Chạy fn trên pool, tối đa PASSWORD_HASH_CONCURRENCY việc cùng lúc.
+    Chờ quá PASSWORD_HASH_QUEUE_TIMEOUT giây thì trả 503 thay vì treo request.
+    """
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        # không có pool (dev / benchmark): vẫn không chặn event loop
+        return await run_in_threadpool(fn, *args)
+
+    try:
+        await asyncio.wait_for(_slots.acquire(), settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hệ thống đang bận, vui lòng thử lại sau",
+        )
+    try:
+        return await asyncio.wrap_future(_get_pool().submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain, hashed):
+
+def _verify(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+
+def _verify_and_update(plain: str, hashed: str):
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+def hash_password(password: str):
+    """
+    Bản đồng bộ cho script / lệnh bảo trì, route dùng hash_password_async
+    """
+    return _hash(password)
+
+async def hash_password_async(password: str):
+    return await _run(_hash, password)
+
+async def verify_password_async(plain, hashed):
+    return await _run(_verify, plain, hashed)
+
+async def verify_and_update_password_async(plain, hashed):
+    """
+    (đúng mật khẩu?, hash mới nếu cost hiện tại khác BCRYPT_ROUNDS)
+    """
+    return await _run(_verify_and_update, plain, hashed)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=settings.ACCESS_TOKEN_EXPIRE_HOURS)
@@ -0,0 +1,52 @@
+# app/serialization.py
+"""
+Fast path cho response list lớn:
+  - projection(): select đúng các cột của schema Out, không dựng ORM object,
+    không qua identity map
+  - list_adapter(): TypeAdapter(list[Schema]) dựng 1 lần / schema
+  - ORJSONResponse: trả thẳng Response, FastAPI không validate lại lần 2
+"""
+from functools import lru_cache
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+def _default(value):
+    # asyncpg trả UUID của riêng nó (lớp con của uuid.UUID), orjson chỉ nhận đúng uuid.UUID
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Không serialize được {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        # OPT_UTC_Z: datetime UTC ra "...Z" giống Pydantic
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def projection(entity, schema: type[BaseModel]) -> list:
+    """
+    Các cột của entity trùng tên field của schema, dùng: select(*projection(...))
+    """
+    return [getattr(entity, name) for name in schema.model_fields]
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def list_response(schema: type[BaseModel], rows, headers: dict | None = None) -> ORJSONResponse:
+    """
+    rows: Row của select(*projection(...)) hoặc ORM object (from_attributes)
+    """
+    adapter = list_adapter(schema)
+    items = adapter.validate_python(rows, from_attributes=True)
+    return ORJSONResponse(adapter.dump_python(items), headers=headers)
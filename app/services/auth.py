@@ -1,16 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import HTTPException, Depends, Header, status
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.config import settings
 from app.models.user import User
 
 
-def get_current_user(
-    authorization: str = Header(default=None, alias="Authorization"),
-    db: Session = Depends(get_db),
-):
+class PrincipalCache:
+    """
+    Cache LRU + TTL cho user đã xác thực, key = sub trong JWT.
+    Giữ bản copy tách khỏi session, mỗi request merge lại vào session của nó.
+    Bản copy không có cột password -> route cần hash thì đọc thẳng từ DB.
+    """
+
+    EXCLUDED = frozenset({"password"})
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> User | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, user: User):
+        # không giữ hash mật khẩu: invalidate chỉ có hiệu lực trong process này,
+        # worker khác có thể giữ bản cũ tới hết TTL sau khi đổi mật khẩu
+        snapshot = User(
+            **{
+                attr.key: getattr(user, attr.key)
+                for attr in inspect(User).column_attrs
+                if attr.key not in self.EXCLUDED
+            }
+        )
+        make_transient_to_detached(snapshot)
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, snapshot)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+
+def invalidate_principal(user_id):
+    """
+    Gọi sau khi sửa bảng users (đổi mật khẩu, fcm token, ...)
+    """
+    principal_cache.invalidate(str(user_id))
+
+
+def _token_subject(authorization: str | None) -> str:
     if authorization is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,11 +113,52 @@ def get_current_user(
             detail="Token không hợp lệ",
         )
 
+    return user_id
+
+
+def _user_not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="User không tồn tại",
+    )
+
+
+def get_current_user(
+    authorization: str = Header(default=None, alias="Authorization"),
+    db: Session = Depends(get_db),
+):
+    user_id = _token_subject(authorization)
+
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        # gắn bản copy vào session hiện tại, không query lại DB
+        return db.merge(cached, load=False)
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User không tồn tại",
-        )
+        raise _user_not_found()
+
+    principal_cache.set(user_id, user)
+    return user
+
+
+async def get_current_user_async(
+    authorization: str = Header(default=None, alias="Authorization"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bản async của get_current_user cho các route chạy trên AsyncSession
+    """
+    user_id = _token_subject(authorization)
+
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if not user:
+        raise _user_not_found()
 
-    return user
\ No newline at end of file
+    principal_cache.set(user_id, user)
+    return user
@@ -0,0 +1,317 @@
+# app/services/bank_import.py
+"""
+Import sao kê ngân hàng (CSV / NDJSON) vào bank_transactions.
+
+Cột / key nhận được: date, amount, type (tuỳ chọn), description (tuỳ chọn).
+Thiếu type thì amount âm = expense, dương = income.
+
+Đọc file và ghi DB theo lô IMPORT_CHUNK_SIZE dòng, RAM không theo kích thước file.
+Số dư: dòng mới không được ghi ngày trước giao dịch mới nhất đã có của account
+(400 kèm số dòng), nên balance_after nối tiếp số dư hiện tại mà không làm sai
+lịch sử; dòng trùng (đã import) bỏ qua trước khi kiểm tra, import lại sao kê
+chồng khoảng ngày vẫn được.
+"""
+import codecs
+import csv
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, any_, bindparam, case, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.bank_account import BankAccount
+from app.models.bank_transaction import BankTransaction
+from app.schemas.money import to_minor_units
+
+DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%d-%m-%Y")
+IMPORT_CHUNK_SIZE = 1000
+
+
+def _bad_line(line_no: int, reason: str):
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Dòng {line_no}: {reason}",
+    )
+
+
+def _parse_date(value: str) -> datetime:
+    value = value.strip()
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"ngày không hợp lệ: {value!r}")
+
+    # bank_transactions.date lưu naive UTC (giống datetime.utcnow())
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _parse_row(raw: dict, line_no: int) -> dict:
+    try:
+        date = _parse_date(str(raw.get("date") or ""))
+        amount = to_minor_units(str(raw.get("amount")).replace(",", ""))
+    except (TypeError, ValueError) as e:
+        raise _bad_line(line_no, str(e))
+
+    tx_type = (raw.get("type") or "").strip().lower()
+    if not tx_type:
+        tx_type = "expense" if amount < 0 else "income"
+    if tx_type not in ("income", "expense"):
+        raise _bad_line(line_no, "type phải là 'income' hoặc 'expense'")
+
+    description = (raw.get("description") or "").strip() or None
+    return {
+        "type": tx_type,
+        "amount": abs(amount),
+        "description": description,
+        "date": date,
+        "line_no": line_no,
+    }
+
+
+def _decoded_lines(fileobj):
+    # giải mã từng dòng vật lý: lỗi UTF-8 báo đúng số dòng (byte \n không nằm giữa ký tự UTF-8)
+    for line_no, raw in enumerate(fileobj, start=1):
+        if line_no == 1:
+            raw = raw.removeprefix(codecs.BOM_UTF8)
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _bad_line(line_no, "file không phải UTF-8")
+        # Postgres không nhận NUL trong chuỗi
+        if "\x00" in line:
+            raise _bad_line(line_no, "file chứa ký tự NUL")
+        yield line
+
+
+def iter_statement(fileobj, fmt: str):
+    """
+    Đọc từng dòng từ file upload (binary), không load cả file vào RAM.
+    File không phải UTF-8 / CSV hỏng dấu nháy -> 400 kèm số dòng như lỗi dữ liệu.
+    """
+    lines = _decoded_lines(fileobj)
+
+    if fmt == "csv":
+        consumed = 0
+
+        def counted():
+            # reader.line_num không tăng khi csv.Error -> tự đếm dòng đã đọc
+            nonlocal consumed
+            for line in lines:
+                consumed += 1
+                yield line
+
+        # strict: dấu nháy hỏng / thiếu nháy đóng là lỗi, không nuốt im phần còn lại của file
+        reader = csv.DictReader(counted(), strict=True)
+        rows = iter(reader)
+        while True:
+            try:
+                raw = next(rows)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                raise _bad_line(consumed, f"CSV không hợp lệ ({e})")
+            # line_num = dòng vật lý cuối của bản ghi (dòng 1 là header)
+            yield _parse_row({k.strip().lower(): v for k, v in raw.items() if k}, reader.line_num)
+    else:
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError:
+                raise _bad_line(line_no, "JSON không hợp lệ")
+            if not isinstance(raw, dict):
+                raise _bad_line(line_no, "mỗi dòng phải là 1 object")
+            yield _parse_row({k.lower(): v for k, v in raw.items()}, line_no)
+
+
+def next_chunk(rows) -> list[dict]:
+    """
+    Lấy tối đa IMPORT_CHUNK_SIZE dòng kế tiếp (list rỗng = hết file)
+    """
+    return list(islice(rows, IMPORT_CHUNK_SIZE))
+
+
+def content_hash(row: dict, occurrence: int) -> str:
+    """
+    occurrence = lần xuất hiện thứ mấy của cùng nội dung trong file:
+    2 ly cà phê giống hệt nhau trong 1 ngày vẫn là 2 giao dịch,
+    nhưng import lại cùng file thì không bị nhân đôi.
+    """
+    raw = "|".join(
+        [
+            row["date"].isoformat(),
+            row["type"],
+            f"{row['amount']:.2f}",
+            row["description"] or "",
+            str(occurrence),
+        ]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class StatementImport:
+    """
+    1 lần import, chạy trong 1 transaction DB (không commit):
+    begin() khoá account -> add() từng lô: gắn hash, bỏ dòng đã có, insert
+    -> finish() tính balance_after cho các dòng mới + cộng số dư account.
+    Các bước nhận db làm tham số đầu: gọi được qua AsyncSession.run_sync.
+    """
+
+    def __init__(self, account_id, user_id):
+        self.account_id = account_id
+        self.user_id = user_id
+        self.seen = Counter()
+        self.total = 0
+        self.ids = []
+        self.income = 0
+        self.expense = 0
+        self.base_balance = 0
+        self.latest = None
+
+    def begin(self, db: Session):
+        # lock để 2 lần import cùng file chạy song song không cùng lọt qua bước lọc trùng
+        # kèm ngày giao dịch mới nhất (mốc chặn dòng ghi lùi ngày), cùng 1 câu
+        latest = (
+            select(func.max(BankTransaction.date))
+            .where(BankTransaction.account_id == BankAccount.id)
+            .scalar_subquery()
+        )
+        acc = db.execute(
+            select(BankAccount.balance, latest.label("latest"))
+            .where(BankAccount.id == self.account_id, BankAccount.user_id == self.user_id)
+            .with_for_update(of=BankAccount)
+        ).first()
+        if not acc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tài khoản ngân hàng không tồn tại",
+            )
+        self.base_balance = acc.balance or 0
+        self.latest = acc.latest
+
+    def add(self, db: Session, rows: list[dict]):
+        self.total += len(rows)
+        if self.total > settings.BANK_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Tối đa {settings.BANK_IMPORT_MAX_ROWS} dòng mỗi lần import",
+            )
+
+        for row in rows:
+            key = (row["date"], row["type"], row["amount"], row["description"])
+            self.seen[key] += 1
+            row["content_hash"] = content_hash(row, self.seen[key])
+
+        existing = set(
+            db.execute(
+                select(BankTransaction.content_hash).where(
+                    BankTransaction.account_id == self.account_id,
+                    BankTransaction.content_hash.in_([row["content_hash"] for row in rows]),
+                )
+            ).scalars()
+        )
+
+        new_rows = []
+        for row in rows:
+            if row["content_hash"] in existing:
+                continue
+            if self.latest is not None and row["date"] < self.latest:
+                raise _bad_line(
+                    row["line_no"],
+                    f"ngày {row['date']:%d/%m/%Y %H:%M} trước giao dịch mới nhất của tài khoản "
+                    f"({self.latest:%d/%m/%Y %H:%M}), không chèn được vào lịch sử số dư",
+                )
+            if row["type"] == "income":
+                self.income += row["amount"]
+            else:
+                self.expense += row["amount"]
+            new_rows.append(
+                {
+                    "id": uuid4(),
+                    "account_id": self.account_id,
+                    "type": row["type"],
+                    "amount": row["amount"],
+                    "description": row["description"],
+                    "date": row["date"],
+                    "content_hash": row["content_hash"],
+                }
+            )
+
+        if new_rows:
+            db.execute(insert(BankTransaction), new_rows)
+            self.ids.extend(row["id"] for row in new_rows)
+
+    def finish(self, db: Session) -> dict:
+        balance = self.base_balance
+        if self.ids:
+            # số dư chạy theo (date, id) cho mọi dòng mới, thứ tự trong file không quan trọng
+            signed = case(
+                (BankTransaction.type == "income", BankTransaction.amount),
+                else_=-BankTransaction.amount,
+            )
+            running = (
+                select(
+                    BankTransaction.id,
+                    (
+                        literal(self.base_balance, BigInteger)
+                        + func.sum(signed).over(order_by=(BankTransaction.date, BankTransaction.id))
+                    ).label("balance_after"),
+                )
+                .where(
+                    BankTransaction.id
+                    == any_(bindparam("ids", self.ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+                )
+                .subquery()
+            )
+            db.execute(
+                update(BankTransaction)
+                .where(BankTransaction.id == running.c.id)
+                .values(balance_after=running.c.balance_after)
+            )
+            # cộng dồn trong DB như create_bank_transaction, không ghi đè số dư
+            balance = db.execute(
+                update(BankAccount)
+                .where(BankAccount.id == self.account_id)
+                .values(
+                    balance=func.coalesce(BankAccount.balance, 0) + (self.income - self.expense),
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(BankAccount.balance)
+            ).scalar_one()
+
+        return {
+            "account_id": self.account_id,
+            "imported": len(self.ids),
+            "duplicates": self.total - len(self.ids),
+            "total_income": self.income,
+            "total_expense": self.expense,
+            "balance": balance,
+        }
+
+
+def import_statement(db: Session, account_id, user_id, rows) -> dict:
+    """
+    Import cả file trong 1 lượt (route sync): đọc + ghi từng lô. Không commit.
+    """
+    job = StatementImport(account_id, user_id)
+    job.begin(db)
+    while chunk := next_chunk(rows):
+        job.add(db, chunk)
+    return job.finish(db)
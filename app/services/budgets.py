@@ -0,0 +1,267 @@
+# app/services/budgets.py
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    and_,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import INTERVAL, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.budget import Budget
+from app.models.budget_period_spend import BudgetPeriodSpend
+from app.models.transaction import Transaction
+from app.notifications import enqueue_notification
+from app.schemas.budget import BudgetProgressOut
+from app.schemas.money import format_vnd
+
+PERIODS = ("day", "week", "month", "year")
+PERIOD_LABELS = {"day": "hôm nay", "week": "tuần này", "month": "tháng này", "year": "năm nay"}
+
+# ngưỡng cảnh báo (% amount), mỗi ngưỡng báo 1 lần / kỳ
+ALERT_THRESHOLDS = (100, 80)
+
+
+def _period_unit(period_col):
+    # period lạ / NULL coi như month
+    return case((period_col.in_(PERIODS), period_col), else_=literal("month"))
+
+
+def period_start_at(period_col, tz: str, at):
+    """
+    Đầu kỳ chứa thời điểm at, cắt theo giờ địa phương tz
+    """
+    return func.timezone(tz, func.date_trunc(_period_unit(period_col), func.timezone(tz, at)))
+
+
+def period_bounds(period_col, tz: str):
+    """
+    (đầu kỳ, đầu kỳ sau) của kỳ hiện tại, cắt theo giờ địa phương tz
+    """
+    unit = _period_unit(period_col)
+    start_local = func.date_trunc(unit, func.timezone(tz, func.now()))
+    end_local = start_local + cast(literal("1 ").concat(unit), INTERVAL)
+    return func.timezone(tz, start_local), func.timezone(tz, end_local)
+
+
+def _current_period_spend(tz: str):
+    """
+    (đầu kỳ, tổng đã chi, điều kiện join transactions) cho select từ budgets.
+    Budget overall cộng mọi khoản chi, budget category chỉ cộng đúng danh mục.
+    """
+    start, end = period_bounds(Budget.period, tz)
+    spent = func.coalesce(func.sum(Transaction.amount), 0)
+    onclause = and_(
+        Transaction.user_id == Budget.user_id,
+        Transaction.deleted_at.is_(None),
+        Transaction.type == "expense",
+        or_(Budget.type != "category", Transaction.category_id == Budget.category_id),
+        Transaction.date >= start,
+        Transaction.date < end,
+    )
+    return start, spent, onclause
+
+
+def _alert_level(spent, amount):
+    return case(
+        *[(and_(amount > 0, spent >= amount * pct / 100), pct) for pct in ALERT_THRESHOLDS],
+        else_=0,
+    )
+
+
+def budget_progress_stmt(user_id: UUID, tz: str):
+    """
+    Mọi budget của user + số đã chi trong kỳ hiện tại, 1 câu SQL
+    """
+    start, spent, onclause = _current_period_spend(tz)
+    return (
+        select(Budget, spent.label("spent"), start.label("period_start"))
+        .outerjoin(Transaction, onclause)
+        .where(Budget.user_id == user_id)
+        .group_by(Budget.id)
+        .order_by(Budget.created_at.asc())
+    )
+
+
+def budget_progress_rows(rows) -> list[BudgetProgressOut]:
+    return [
+        BudgetProgressOut(
+            id=budget.id,
+            amount=budget.amount,
+            period=budget.period,
+            type=budget.type,
+            category_id=budget.category_id,
+            is_active=budget.is_active,
+            spent=spent,
+            remaining=(budget.amount or 0) - spent,
+            period_start=period_start,
+        )
+        for budget, spent, period_start in rows
+    ]
+
+
+# --------- bộ đếm budget_period_spend ---------
+def seed_budget_spend(db: Session, user_id: UUID | None = None, budget_id: UUID | None = None) -> int:
+    """
+    Tính lại bộ đếm từ bảng transactions (budget mới tạo / vừa sửa, hoặc sửa
+    lệch số liệu): kỳ hiện tại + các kỳ sau đã có giao dịch ghi ngày trước.
+    Kỳ hiện tại đặt alert_level theo mức hiện tại, không gửi notif; kỳ sau để 0.
+    Không commit. Trả về số dòng bộ đếm đã ghi.
+    """
+    tz = settings.DEFAULT_TIMEZONE
+    current = period_start_at(Budget.period, tz, func.now())
+    tx_period = func.coalesce(period_start_at(Budget.period, tz, Transaction.date), current)
+    onclause = and_(
+        Transaction.user_id == Budget.user_id,
+        Transaction.deleted_at.is_(None),
+        Transaction.type == "expense",
+        or_(Budget.type != "category", Transaction.category_id == Budget.category_id),
+        Transaction.date >= current,
+    )
+
+    scope = []
+    if user_id:
+        scope.append(Budget.user_id == user_id)
+    if budget_id:
+        scope.append(Budget.id == budget_id)
+
+    # mỗi dòng = 1 giao dịch khớp (hoặc 1 dòng rỗng cho budget chưa chi gì)
+    matched = (
+        select(
+            Budget.id.label("budget_id"),
+            Budget.amount.label("budget_amount"),
+            tx_period.label("period_start"),
+            (tx_period == current).label("is_current"),
+            func.coalesce(Transaction.amount, 0).label("amount"),
+        )
+        .outerjoin(Transaction, onclause)
+        .where(*scope)
+        .subquery()
+    )
+    spent = func.sum(matched.c.amount)
+    sel = select(
+        matched.c.budget_id,
+        matched.c.period_start,
+        spent,
+        case((matched.c.is_current, _alert_level(spent, matched.c.budget_amount)), else_=0),
+    ).group_by(
+        matched.c.budget_id,
+        matched.c.period_start,
+        matched.c.budget_amount,
+        matched.c.is_current,
+    )
+
+    # kỳ sau tính lại từ đầu (budget đổi danh mục / loại thì số cũ sai)
+    db.execute(
+        delete(BudgetPeriodSpend).where(
+            BudgetPeriodSpend.budget_id == Budget.id,
+            BudgetPeriodSpend.period_start > current,
+            *scope,
+        )
+    )
+
+    stmt = insert(BudgetPeriodSpend).from_select(
+        ["budget_id", "period_start", "spent", "alert_level"], sel
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start],
+        set_={
+            "spent": stmt.excluded.spent,
+            "alert_level": stmt.excluded.alert_level,
+            "updated_at": func.now(),
+        },
+    )
+    return db.execute(stmt).rowcount
+
+
+def apply_budget_spend(
+    db: Session,
+    user_id: UUID,
+    category_id: UUID | None,
+    date: datetime | None,
+    amount: int,
+    sign: int = 1,
+):
+    """
+    Cộng (sign=1) / trừ (sign=-1) 1 khoản chi vào bộ đếm các budget liên quan.
+    Giao dịch kỳ trước bỏ qua; giao dịch ghi ngày ở kỳ sau cộng vào dòng của kỳ
+    đó, tới lúc kỳ bắt đầu số đã chi có sẵn. Vượt ngưỡng 80% / 100% lần đầu
+    trong kỳ HIỆN TẠI thì xếp notif vào outbox.
+    Tối đa 2 câu SQL, không phụ thuộc số giao dịch của user. Không commit.
+    """
+    tz = settings.DEFAULT_TIMEZONE
+    at = literal(date, DateTime(timezone=True)) if date else func.now()
+    tx_period = period_start_at(Budget.period, tz, at)
+    current = period_start_at(Budget.period, tz, func.now())
+
+    matches = Budget.type != "category"
+    if category_id:
+        matches = or_(matches, Budget.category_id == category_id)
+
+    sel = select(Budget.id, tx_period, literal(int(amount or 0) * sign, BigInteger)).where(
+        Budget.user_id == user_id,
+        func.coalesce(Budget.is_active, "true") != "false",
+        matches,
+        tx_period >= current,
+    )
+    stmt = insert(BudgetPeriodSpend).from_select(["budget_id", "period_start", "spent"], sel)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start],
+        set_={
+            "spent": BudgetPeriodSpend.spent + stmt.excluded.spent,
+            "updated_at": func.now(),
+        },
+    ).returning(BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start)
+
+    touched = db.execute(stmt).all()
+    # trừ tiền thì không thể vượt ngưỡng
+    if not touched or sign < 0:
+        return
+
+    level = _alert_level(BudgetPeriodSpend.spent, Budget.amount)
+    crossed = db.execute(
+        update(BudgetPeriodSpend)
+        .where(
+            BudgetPeriodSpend.budget_id == Budget.id,
+            tuple_(BudgetPeriodSpend.budget_id, BudgetPeriodSpend.period_start).in_(
+                [tuple(row) for row in touched]
+            ),
+            BudgetPeriodSpend.period_start == current,
+            level > BudgetPeriodSpend.alert_level,
+        )
+        .values(alert_level=level)
+        .returning(
+            BudgetPeriodSpend.budget_id,
+            BudgetPeriodSpend.spent,
+            BudgetPeriodSpend.alert_level,
+            Budget.amount,
+            Budget.period,
+        )
+    ).all()
+
+    for budget_id, spent, pct, budget_amount, period in crossed:
+        period_label = PERIOD_LABELS.get(period, PERIOD_LABELS["month"])
+        title = "Vượt ngân sách" if pct >= 100 else f"Đã dùng {pct}% ngân sách"
+        enqueue_notification(
+            db,
+            [user_id],
+            title=title,
+            body=f"Bạn đã chi {format_vnd(spent)} / {format_vnd(budget_amount)} ngân sách {period_label}",
+            data={
+                "type": "budget_alert",
+                "budget_id": str(budget_id),
+                "level": str(pct),
+            },
+        )
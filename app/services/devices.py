@@ -0,0 +1,56 @@
+# app/services/devices.py
+from collections import defaultdict
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.device_token import DeviceToken
+from app.models.user import User
+
+
+def register_device_token(db: Session, user_id: UUID, token: str):
+    """
+    Lưu token của thiết bị. Token đã có (máy đổi tài khoản) thì chuyển sang user mới.
+    Không commit.
+    """
+    stmt = insert(DeviceToken).values(user_id=user_id, token=token)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DeviceToken.token],
+        set_={"user_id": user_id, "last_seen_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def tokens_for_users(db: Session, user_ids) -> dict[UUID, list[str]]:
+    """
+    {user_id: [token, ...]} cho nhiều user bằng 1 query
+    """
+    result: dict[UUID, list[str]] = defaultdict(list)
+    if not user_ids:
+        return result
+
+    rows = db.query(DeviceToken.user_id, DeviceToken.token).filter(
+        DeviceToken.user_id.in_(user_ids)
+    )
+    for user_id, token in rows:
+        result[user_id].append(token)
+    return result
+
+
+def prune_tokens(db: Session, tokens: list[str]):
+    """
+    Xoá các token FCM báo là hết hạn / không hợp lệ. Không commit.
+    """
+    if not tokens:
+        return
+
+    db.query(DeviceToken).filter(DeviceToken.token.in_(tokens)).delete(
+        synchronize_session=False
+    )
+    # cột cũ users.fcm_token cũng dọn luôn cho đồng bộ
+    db.query(User).filter(User.fcm_token.in_(tokens)).update(
+        {User.fcm_token: None}, synchronize_session=False
+    )
+    print(f"🧹 Đã xoá {len(tokens)} FCM token không còn hợp lệ")
@@ -1,12 +1,21 @@
 import os
-import resend
+from functools import lru_cache
 
-resend.api_key = os.getenv("RESEND_API_KEY")
 RESEND_FROM = os.getenv("RESEND_FROM", "onboarding@resend.dev")
 
 
+@lru_cache(maxsize=1)
+def _resend():
+    # import resend (~300ms) lúc gửi mail đầu tiên, không làm chậm khởi động
+    import resend
+
+    resend.api_key = os.getenv("RESEND_API_KEY")
+    return resend
+
+
 def send_email(to_email: str, subject: str, body: str) -> bool:
     try:
+        resend = _resend()
         r = resend.Emails.send({
             "from": RESEND_FROM,
             "to": to_email,
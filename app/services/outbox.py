@@ -0,0 +1,194 @@
+# app/services/outbox.py
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification_outbox import NotificationOutbox
+from app.notifications import is_permanent_error, send_multicast
+from app.services.devices import prune_tokens, tokens_for_users
+
+# pool riêng cho FCM, không đụng threadpool xử lý request
+_executor = ThreadPoolExecutor(
+    max_workers=settings.OUTBOX_CONCURRENCY,
+    thread_name_prefix="outbox",
+)
+
+
+def _backoff(attempts: int) -> timedelta:
+    # 10s, 20s, 40s, ... tối đa 1h, thêm jitter cho khỏi dồn cục
+    delay = min(settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), 3600)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _deliver(tokens: list[str], title: str, body: str, data: dict | None):
+    """
+    Gửi 1 notif tới mọi thiết bị của mọi người nhận bằng multicast.
+    Trả về (token chết, lỗi cần retry hoặc None).
+    """
+    if not tokens:
+        return [], None
+
+    success, dead_tokens, errors = send_multicast(tokens, title, body, data)
+    # chỉ retry khi không tới được máy nào vì lỗi tạm thời
+    error = errors[0] if errors and not success else None
+    return dead_tokens, error
+
+
+def _claim(db: Session):
+    """
+    Nhận 1 lô notif đến hạn bằng lease: đẩy next_attempt_at ra sau
+    OUTBOX_LEASE_SECONDS và tăng attempts, rồi commit ngay. Khoá dòng chỉ
+    sống trong câu UPDATE này, không giữ suốt lúc gọi FCM.
+    """
+    now = datetime.now(timezone.utc)
+    # SKIP LOCKED: nhiều worker (nhiều process uvicorn) không lấy trùng dòng
+    due = (
+        select(NotificationOutbox.id)
+        .where(
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.next_attempt_at.asc())
+        .limit(settings.OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    items = db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(due))
+        .values(
+            attempts=NotificationOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+        )
+        .returning(
+            NotificationOutbox.id,
+            NotificationOutbox.user_ids,
+            NotificationOutbox.title,
+            NotificationOutbox.body,
+            NotificationOutbox.data,
+            NotificationOutbox.attempts,
+        )
+    ).all()
+    if not items:
+        db.rollback()
+        return [], {}
+
+    # tra token (mọi thiết bị) của mọi người nhận trong lô bằng 1 query
+    user_ids = {uid for item in items for uid in item.user_ids}
+    tokens = tokens_for_users(db, user_ids)
+    db.commit()
+    return items, tokens
+
+
+def dispatch_once(db: Session) -> int:
+    """
+    Lấy 1 lô notif đến hạn, gửi song song (giới hạn OUTBOX_CONCURRENCY),
+    lỗi thì hẹn lại theo backoff, quá OUTBOX_MAX_ATTEMPTS thì đánh dấu dead.
+    Trả về số notif đã xử lý.
+
+    3 bước: nhận lô (transaction ngắn) -> gửi FCM (không giữ connection,
+    không giữ khoá) -> ghi kết quả (transaction ngắn thứ 2).
+    """
+    items, tokens = _claim(db)
+    if not items:
+        return 0
+
+    futures = [
+        _executor.submit(
+            _deliver,
+            list({t for uid in item.user_ids for t in tokens.get(uid, [])}),
+            item.title,
+            item.body,
+            item.data,
+        )
+        for item in items
+    ]
+
+    dead_tokens: list[str] = []
+    results = []
+    for item, future in zip(items, futures):
+        try:
+            dead, error = future.result()
+            dead_tokens.extend(dead)
+            if error:
+                raise error
+            values = {
+                "status": "sent",
+                "sent_at": datetime.now(timezone.utc),
+                "last_error": None,
+            }
+        except Exception as e:
+            values = {"last_error": repr(e)[:500]}
+            # payload hỏng: không retry, cũng không đụng tới token của người nhận
+            if item.attempts >= settings.OUTBOX_MAX_ATTEMPTS or is_permanent_error(e):
+                values["status"] = "dead"
+                print("❌ Outbox dead-letter:", item.id, values["last_error"])
+            else:
+                values["next_attempt_at"] = datetime.now(timezone.utc) + _backoff(item.attempts)
+        results.append((item, values))
+
+    for item, values in results:
+        # attempts làm token của lease: lease đã hết hạn và worker khác nhận lại
+        # dòng này (attempts tăng tiếp) thì kết quả của lượt này bỏ qua
+        db.execute(
+            update(NotificationOutbox)
+            .where(
+                NotificationOutbox.id == item.id,
+                NotificationOutbox.attempts == item.attempts,
+                NotificationOutbox.status == "pending",
+            )
+            .values(**values)
+        )
+    prune_tokens(db, dead_tokens)
+    db.commit()
+    return len(items)
+
+
+def purge_sent(db: Session, days: int = 7) -> int:
+    """
+    Xoá notif đã gửi cũ hơn N ngày (giữ lại dòng dead để tra lỗi)
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    count = (
+        db.query(NotificationOutbox)
+        .filter(
+            NotificationOutbox.status == "sent",
+            NotificationOutbox.sent_at < cutoff,
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def _dispatch_with_session() -> int:
+    db = SessionLocal()
+    try:
+        return dispatch_once(db)
+    finally:
+        db.close()
+
+
+async def run_dispatcher():
+    """
+    Vòng lặp worker chạy nền trong app (startup event).
+    Hết việc thì ngủ OUTBOX_POLL_SECONDS, còn việc thì chạy tiếp luôn.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            handled = await loop.run_in_executor(None, _dispatch_with_session)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("❌ Outbox worker error:", repr(e))
+            handled = 0
+
+        if not handled:
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
@@ -0,0 +1,121 @@
+# app/services/rollups.py
+from datetime import date, datetime, time
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, DateTime, cast, func, literal, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.daily_rollup import DailyRollup
+
+
+def local_day(at, tz: str = settings.DEFAULT_TIMEZONE):
+    """
+    Ngày địa phương (tz) của thời điểm at, dạng biểu thức SQL
+    """
+    return cast(func.timezone(tz, at), Date)
+
+
+def apply_rollup(
+    db: Session,
+    user_id: UUID,
+    category_id: UUID | None,
+    tx_type: str,
+    date: datetime | None,
+    amount: int,
+    sign: int = 1,
+):
+    """
+    Cộng (sign=1) hoặc trừ (sign=-1) 1 giao dịch vào dòng daily_rollups của
+    ngày đó. date=None: giao dịch lấy now() ở server_default.
+    Không commit: chạy chung transaction DB với thao tác trên bảng transactions.
+    """
+    at = literal(date, DateTime(timezone=True)) if date else func.now()
+
+    stmt = insert(DailyRollup).values(
+        user_id=user_id,
+        day=local_day(at),
+        category_id=category_id,
+        type=tx_type,
+        amount=int(amount or 0) * sign,
+        tx_count=sign,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            DailyRollup.user_id,
+            DailyRollup.day,
+            DailyRollup.category_id,
+            DailyRollup.type,
+        ],
+        set_={
+            "amount": DailyRollup.amount + stmt.excluded.amount,
+            "tx_count": DailyRollup.tx_count + stmt.excluded.tx_count,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def rebuild_daily_rollups(db: Session, user_id: UUID | None = None) -> int:
+    """
+    Tính lại daily_rollups từ bảng transactions (backfill lịch sử / sửa lệch
+    số liệu / đổi DEFAULT_TIMEZONE). Khoá bảng trong lúc tính để không bị lệch
+    với giao dịch đang ghi. Trả về số dòng rollup đã ghi.
+    """
+    params = {"user_id": user_id, "tz": settings.DEFAULT_TIMEZONE}
+    where = "AND user_id = :user_id" if user_id else ""
+
+    db.execute(text("LOCK TABLE daily_rollups IN EXCLUSIVE MODE"))
+    if user_id:
+        db.execute(text("DELETE FROM daily_rollups WHERE user_id = :user_id"), params)
+    else:
+        db.execute(text("DELETE FROM daily_rollups"))
+    result = db.execute(
+        text(
+            f"""
+            INSERT INTO daily_rollups (user_id, day, category_id, type, amount, tx_count)
+            SELECT
+                user_id,
+                (date AT TIME ZONE :tz)::date AS day,
+                category_id,
+                type,
+                SUM(amount),
+                COUNT(*)
+            FROM transactions
+            WHERE user_id IS NOT NULL AND deleted_at IS NULL AND date IS NOT NULL {where}
+            GROUP BY user_id, day, category_id, type
+            """
+        ),
+        params,
+    )
+    db.commit()
+    return result.rowcount
+
+
+def rollup_range(
+    date_from: datetime | None,
+    date_to: datetime | None,
+    tz: str,
+) -> tuple[date | None, date | None] | None:
+    """
+    Khoảng [from, to) đổi ra ngày của daily_rollups, hoặc None nếu rollup
+    không trả lời đúng được: tz khác DEFAULT_TIMEZONE, mốc không có múi giờ
+    hoặc không rơi đúng 0h giờ địa phương (phải đọc bảng transactions).
+    """
+    if tz != settings.DEFAULT_TIMEZONE:
+        return None
+
+    days = []
+    for at in (date_from, date_to):
+        if at is None:
+            days.append(None)
+            continue
+        if at.tzinfo is None:
+            return None
+        local = at.astimezone(ZoneInfo(tz))
+        if local.time() != time(0):
+            return None
+        days.append(local.date())
+    return days[0], days[1]
@@ -0,0 +1,68 @@
+# app/services/tombstones.py
+"""
+Dọn tombstone (giao dịch đã xoá mềm) cũ.
+
+Tombstone chỉ cần cho client delta sync (/transactions/changes) chưa nhận lần
+xoá. Xoá hẳn tombstone cũ hơn N ngày, đồng thời ghi mốc đã dọn của từng user
+vào resource_versions (resource "transactions_purged" = change_seq lớn nhất đã
+xoá): token cũ hơn mốc này có thể đã lỡ 1 lần xoá -> /changes trả 410, client
+sync lại từ đầu thay vì giữ giao dịch đã xoá.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.resource_version import ResourceVersion
+from app.models.transaction import Transaction
+
+PURGED_RESOURCE = "transactions_purged"
+
+
+def purge_tombstones(db: Session, days: int = 30) -> int:
+    """
+    Xoá tombstone cũ hơn N ngày + nâng mốc đã dọn của user, 1 câu SQL. Commit.
+    Trả về số dòng đã xoá.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    purged = (
+        delete(Transaction)
+        .where(Transaction.deleted_at < cutoff)
+        .returning(Transaction.user_id, Transaction.change_seq)
+        .cte("purged")
+    )
+    horizon = insert(ResourceVersion).from_select(
+        ["user_id", "resource", "version"],
+        select(purged.c.user_id, literal(PURGED_RESOURCE), func.max(purged.c.change_seq))
+        .where(purged.c.user_id.is_not(None))
+        .group_by(purged.c.user_id),
+    )
+    horizon = horizon.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={
+            "version": func.greatest(ResourceVersion.version, horizon.excluded.version),
+            "updated_at": func.now(),
+        },
+    ).cte("horizon")
+
+    count = db.execute(select(func.count()).select_from(purged).add_cte(horizon)).scalar()
+    db.commit()
+    return count
+
+
+def purged_horizon_stmt(user_id: UUID):
+    return select(ResourceVersion.version).where(
+        ResourceVersion.user_id == user_id,
+        ResourceVersion.resource == PURGED_RESOURCE,
+    )
+
+
+def check_sync_token(since_seq: int, horizon: int | None):
+    if horizon is not None and since_seq < horizon:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token quá cũ, vui lòng sync lại từ đầu (bỏ ?since=)",
+        )
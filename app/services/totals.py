@@ -0,0 +1,79 @@
+# app/services/totals.py
+from uuid import UUID
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.user_totals import UserTotals
+
+
+def apply_transaction(db: Session, user_id: UUID, tx_type: str, amount: int, sign: int = 1):
+    """
+    Cộng (sign=1) hoặc trừ (sign=-1) 1 giao dịch vào bảng user_totals.
+    Không commit: chạy chung transaction DB với thao tác trên bảng transactions.
+    """
+    amount = int(amount or 0) * sign
+    income = amount if tx_type == "income" else 0
+    expense = amount if tx_type == "expense" else 0
+
+    stmt = insert(UserTotals).values(
+        user_id=user_id,
+        total_income=income,
+        total_expense=expense,
+        tx_count=sign,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserTotals.user_id],
+        set_={
+            "total_income": UserTotals.total_income + stmt.excluded.total_income,
+            "total_expense": UserTotals.total_expense + stmt.excluded.total_expense,
+            "tx_count": UserTotals.tx_count + stmt.excluded.tx_count,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def get_totals(db: Session, user_id: UUID) -> tuple[int, int]:
+    """
+    (total_income, total_expense) của user, đọc theo khoá chính
+    """
+    row = db.get(UserTotals, user_id)
+    if not row:
+        return 0, 0
+    return row.total_income or 0, row.total_expense or 0
+
+
+def rebuild_user_totals(db: Session, user_id: UUID | None = None) -> int:
+    """
+    Tính lại user_totals từ bảng transactions (backfill / sửa lệch số liệu).
+    Khoá bảng user_totals trong lúc tính để không bị lệch với giao dịch đang ghi.
+    Trả về số user đã được tính lại.
+    """
+    params = {"user_id": user_id}
+    where = "AND user_id = :user_id" if user_id else ""
+
+    db.execute(text("LOCK TABLE user_totals IN EXCLUSIVE MODE"))
+    if user_id:
+        db.execute(text("DELETE FROM user_totals WHERE user_id = :user_id"), params)
+    else:
+        db.execute(text("DELETE FROM user_totals"))
+    result = db.execute(
+        text(
+            f"""
+            INSERT INTO user_totals (user_id, total_income, total_expense, tx_count)
+            SELECT
+                user_id,
+                COALESCE(SUM(amount) FILTER (WHERE type = 'income'), 0),
+                COALESCE(SUM(amount) FILTER (WHERE type = 'expense'), 0),
+                COUNT(*)
+            FROM transactions
+            WHERE user_id IS NOT NULL AND deleted_at IS NULL {where}
+            GROUP BY user_id
+            """
+        ),
+        params,
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,105 @@
+# app/services/versions.py
+"""
+ETag cho các GET list theo version (user, resource) trong bảng resource_versions.
+
+- Mọi route ghi gọi bump_versions() trước commit, chung transaction DB.
+- GET list gọi check_etag() TRƯỚC khi query dữ liệu: If-None-Match khớp thì
+  trả 304 ngay, cả request chỉ tốn 1 câu SELECT theo khoá chính.
+  Đọc version trước dữ liệu: có ghi chen giữa thì ETag cũ đi với dữ liệu mới,
+  lần poll sau client chỉ tải lại thừa 1 lần, không bao giờ giữ dữ liệu cũ.
+"""
+import hashlib
+from uuid import UUID
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.resource_version import ResourceVersion
+
+# tăng khi đổi shape JSON của các response list -> client tải lại hết
+ETAG_REVISION = 2
+
+
+def bump_versions(db: Session, user_id: UUID, *resources: str) -> dict[str, int]:
+    """
+    Tăng version của các resource, không commit. Trả về {resource: version mới}.
+
+    Dòng resource_versions bị khoá tới lúc commit: các lần ghi của cùng 1 user
+    nối đuôi nhau, version nhỏ hơn luôn commit trước (dùng làm change_seq).
+    Gọi ĐẦU TIÊN trong route ghi để mọi khoá khác đều lấy sau khoá này.
+    """
+    stmt = insert(ResourceVersion).values(
+        [{"user_id": user_id, "resource": r, "version": 1} for r in resources]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1, "updated_at": func.now()},
+    ).returning(ResourceVersion.resource, ResourceVersion.version)
+    return dict(db.execute(stmt).all())
+
+
+def version_stmt(user_id: UUID, resource: str):
+    return select(ResourceVersion.version).where(
+        ResourceVersion.user_id == user_id,
+        ResourceVersion.resource == resource,
+    )
+
+
+def make_etag(
+    resource: str, version: int, request: Request, user_id: UUID, *extra
+) -> str:
+    """
+    Cùng version nhưng khác query (?limit, ?before, ?tz, ...) là response khác
+    -> băm query string + extra vào ETag. Băm cả user_id: 2 user cùng version
+    không được trùng ETag (máy đổi tài khoản sẽ nhận 304 với list của user cũ)
+    """
+    key = "|".join(
+        [str(ETAG_REVISION), str(user_id), str(request.query_params), *map(str, extra)]
+    )
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'W/"{resource}-{version}-{digest}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # so sánh yếu: bỏ tiền tố W/
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque
+        for tag in if_none_match.split(",")
+    )
+
+
+def _finish(
+    request: Request, user_id: UUID, resource: str, version: int | None, extra
+) -> dict:
+    etag = make_etag(resource, version or 0, request, user_id, *extra)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers
+
+
+def check_etag(db: Session, request: Request, user_id: UUID, resource: str, *extra) -> dict:
+    """
+    304 nếu client đã có bản mới nhất, ngược lại trả header ETag để gắn vào response
+    """
+    version = db.execute(version_stmt(user_id, resource)).scalar()
+    return _finish(request, user_id, resource, version, extra)
+
+
+async def check_etag_async(
+    db: AsyncSession, request: Request, user_id: UUID, resource: str, *extra
+) -> dict:
+    version = (await db.execute(version_stmt(user_id, resource))).scalar()
+    return _finish(request, user_id, resource, version, extra)
@@ -0,0 +1,20 @@
+# app/timezones.py
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException, Query, status
+
+from app.config import settings
+
+
+def timezone_param(tz: str = Query(settings.DEFAULT_TIMEZONE)) -> str:
+    """
+    Dependency cho ?tz=..., tên múi giờ IANA (Postgres dùng chung bộ tên này)
+    """
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Múi giờ không hợp lệ",
+        )
+    return tz
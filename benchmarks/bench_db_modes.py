@@ -0,0 +1,145 @@
+# benchmarks/bench_db_modes.py
+"""
+So sánh DB_MODE=sync và DB_MODE=async trên cùng DB: lần lượt bật uvicorn
+ở từng chế độ, bắn song song các request trong ENDPOINTS (đọc + ghi) rồi in req/s.
+
+    DATABASE_URL=... python benchmarks/bench_db_modes.py -c 64 -d 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# (path, body): body khác None -> POST
+ENDPOINTS = [
+    ("/transactions/", None),
+    ("/wallets/", None),
+    ("/family/", None),
+    ("/transactions/", {"type": "expense", "amount": 1000}),
+]
+
+
+def request(url, payload=None, token=None):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode() if payload is not None else None,
+        headers={"Content-Type": "application/json"},
+        method="POST" if payload is not None else "GET",
+    )
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, b""
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if request(f"{base}/")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server không lên")
+
+
+def seed(base, rows):
+    creds = {"email": "bench-modes@example.com", "password": "bench-password"}
+    request(f"{base}/auth/register", creds)
+    _, body = request(f"{base}/auth/login", creds)
+    token = json.loads(body)["access_token"]
+
+    _, body = request(f"{base}/transactions/?limit=1", token=token)
+    if not json.loads(body):
+        request(f"{base}/wallets/", {"balance": 1_000_000}, token)
+        for i in range(rows):
+            request(
+                f"{base}/transactions/",
+                {"type": "expense" if i % 3 else "income", "amount": 1000 + i},
+                token,
+            )
+    return token
+
+
+def run_load(base, token, concurrency, duration):
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(i):
+        nonlocal errors
+        n = 0
+        while time.perf_counter() < stop_at:
+            path, body = ENDPOINTS[(i + n) % len(ENDPOINTS)]
+            t0 = time.perf_counter()
+            status, _ = request(f"{base}{path}", body, token)
+            elapsed = time.perf_counter() - t0
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+            n += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(worker, range(concurrency)))
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    return {
+        "rps": len(latencies) / duration,
+        "p50": p(0.5),
+        "p95": p(0.95),
+        "p99": p(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", type=int, default=64, help="số request song song")
+    parser.add_argument("-d", type=float, default=15, help="số giây chạy mỗi chế độ")
+    parser.add_argument("--rows", type=int, default=200, help="số giao dịch seed")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    results = {}
+
+    for mode in ("sync", "async"):
+        env = dict(os.environ, DB_MODE=mode, OUTBOX_WORKER_ENABLED="false")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_ready(base)
+            token = seed(base, args.rows)
+            run_load(base, token, args.c, 2)  # warm up
+            results[mode] = run_load(base, token, args.c, args.d)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    names = [("POST " if body else "GET ") + path for path, body in ENDPOINTS]
+    print(f"concurrency={args.c} duration={args.d}s endpoints={names}")
+    for mode, r in results.items():
+        print(
+            f"{mode:>5}: {r['rps']:8.1f} req/s  p50 {r['p50']:6.1f} ms  "
+            f"p95 {r['p95']:6.1f} ms  p99 {r['p99']:6.1f} ms  errors {r['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_login.py
+"""
+Đo throughput /auth/login và độ trễ của endpoint thường chạy song song.
+
+Chạy server trước (đổi PASSWORD_HASH_WORKERS=0 để so với bcrypt chạy inline):
+
+    PASSWORD_HASH_WORKERS=2 uvicorn app.main:app --port 8000
+    python benchmarks/bench_login.py --url http://127.0.0.1:8000 -n 200 -c 16
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def post(url, payload, token=None):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def get(url, token):
+    req = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    with urllib.request.urlopen(req) as resp:
+        resp.read()
+        return resp.status
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("-n", type=int, default=200, help="số lần login")
+    parser.add_argument("-c", type=int, default=16, help="số login chạy song song")
+    parser.add_argument("--email", default="bench-login@example.com")
+    parser.add_argument("--password", default="bench-password")
+    args = parser.parse_args()
+
+    creds = {"email": args.email, "password": args.password}
+    post(f"{args.url}/auth/register", creds)
+    status, body = post(f"{args.url}/auth/login", creds)
+    assert status == 200, f"login lỗi: {status}"
+    token = body["access_token"]
+
+    # song song: 1 luồng gọi GET /wallets/ liên tục để đo ảnh hưởng lên CRUD
+    crud_latencies: list[float] = []
+    stop = threading.Event()
+
+    def crud_loop():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            get(f"{args.url}/wallets/", token)
+            crud_latencies.append(time.perf_counter() - t0)
+
+    crud_thread = threading.Thread(target=crud_loop, daemon=True)
+    crud_thread.start()
+
+    def one_login(_):
+        t0 = time.perf_counter()
+        status, _ = post(f"{args.url}/auth/login", creds)
+        return status, time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.c) as ex:
+        results = list(ex.map(one_login, range(args.n)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    crud_thread.join()
+
+    ok = [lat for status, lat in results if status == 200]
+    busy = sum(1 for status, _ in results if status == 503)
+    print(f"login: {len(ok)}/{args.n} ok, {busy} x 503, {len(ok) / elapsed:.1f} login/s")
+    if ok:
+        print(f"  p50 {pct(ok, 0.5):.0f} ms  p95 {pct(ok, 0.95):.0f} ms")
+    if crud_latencies:
+        print(
+            f"GET /wallets/ trong lúc login: {len(crud_latencies)} req, "
+            f"p50 {pct(crud_latencies, 0.5):.0f} ms  p95 {pct(crud_latencies, 0.95):.0f} ms  "
+            f"mean {statistics.mean(crud_latencies) * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
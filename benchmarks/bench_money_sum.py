@@ -0,0 +1,96 @@
+# benchmarks/bench_money_sum.py
+"""
+So sánh SUM tiền kiểu double precision (trước) / numeric / bigint (sau) cho các
+query tổng của family: rebuild user_totals (SUM FILTER GROUP BY user) và tổng
+thu/chi của 1 nhóm member. Dữ liệu nằm trong bảng TEMP, không đụng bảng thật.
+
+    DATABASE_URL=... python benchmarks/bench_money_sum.py --rows 2000000 --users 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+
+COLUMNS = {
+    "double (trước)": "amount_f",
+    "numeric(18,2)": "amount_n",
+    "bigint (sau)": "amount_b",
+}
+
+# rebuild_user_totals: toàn bảng
+REBUILD_SQL = """
+SELECT user_id,
+       SUM({col}) FILTER (WHERE type = 'income'),
+       SUM({col}) FILTER (WHERE type = 'expense')
+FROM money_bench
+GROUP BY user_id
+"""
+
+# tổng của 1 gia đình (list_family / get_user_totals khi chưa có user_totals)
+FAMILY_SQL = """
+SELECT user_id,
+       SUM({col}) FILTER (WHERE type = 'income'),
+       SUM({col}) FILTER (WHERE type = 'expense')
+FROM money_bench
+WHERE user_id = ANY(:members)
+GROUP BY user_id
+"""
+
+
+def timed(conn, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(text(sql), params).all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--family", type=int, default=20, help="số member trong 1 nhóm")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        print(f"⏳ Tạo {args.rows:,} dòng ...")
+        conn.execute(text(
+            """
+            CREATE TEMP TABLE money_bench AS
+            SELECT (i % :users) AS user_id,
+                   CASE WHEN i % 5 = 0 THEN 'income' ELSE 'expense' END AS type,
+                   -- số tiền VND thật: bội số 1.000đ, có vài khoản lẻ đồng
+                   ((i::bigint * 7919) % 5000 * 1000 + (i % 3))::double precision AS amount_f,
+                   ((i::bigint * 7919) % 5000 * 1000 + (i % 3))::numeric(18, 2) AS amount_n,
+                   ((i::bigint * 7919) % 5000 * 1000 + (i % 3))::bigint AS amount_b
+            FROM generate_series(1, :rows) AS i
+            """
+        ), {"rows": args.rows, "users": args.users})
+        conn.execute(text("CREATE INDEX ON money_bench (user_id)"))
+        conn.execute(text("ANALYZE money_bench"))
+
+        members = list(range(args.family))
+        print(f"{'kiểu':<16} {'rebuild ms':>12} {'family ms':>12}")
+        for label, col in COLUMNS.items():
+            rebuild = timed(conn, REBUILD_SQL.format(col=col), {}, args.repeat)
+            family = timed(conn, FAMILY_SQL.format(col=col), {"members": members}, args.repeat)
+            print(f"{label:<16} {rebuild:>12.1f} {family:>12.1f}")
+
+        # độ chính xác: cộng double lệch so với tổng chính xác
+        exact, drift = conn.execute(text(
+            "SELECT SUM(amount_b), SUM(amount_f) - SUM(amount_b)::double precision FROM money_bench"
+        )).one()
+        print(f"\ntổng chính xác {exact:,}đ, double lệch {drift:+.6f}đ")
+
+
+if __name__ == "__main__":
+    main()
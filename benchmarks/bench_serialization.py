@@ -0,0 +1,195 @@
+# benchmarks/bench_serialization.py
+"""
+Đo rows/s của các response list lớn (mặc định 10k dòng), gọi app qua ASGI
+như benchmarks/query_budget.py nên đo cả query + dựng object + serialize JSON.
+
+    DATABASE_URL=... python benchmarks/bench_serialization.py --rows 10000 --repeat 10
+
+Seed 1 owner + 1 member (gia đình) có --rows giao dịch và 1 tài khoản ngân
+hàng có --rows giao dịch; chạy lại thì dùng lại dữ liệu cũ.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "false")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.bank_account import BankAccount  # noqa: E402
+from app.models.bank_transaction import BankTransaction  # noqa: E402
+from app.models.category import Category  # noqa: E402
+from app.models.family_member import FamilyMember  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.security import create_access_token  # noqa: E402
+
+OWNER_EMAIL = "ser-owner@example.com"
+MEMBER_EMAIL = "ser-member@example.com"
+
+ENDPOINTS = [
+    "/family/{member_id}/transactions",
+    "/bank/accounts/{account_id}/transactions",
+    "/transactions/?limit=200",
+    "/categories/",
+]
+
+
+# --------- seed ---------
+def seed(rows: int) -> dict:
+    db = SessionLocal()
+    try:
+        owner_id = db.execute(select(User.id).where(User.email == OWNER_EMAIL)).scalar()
+        if owner_id is None:
+            rnd = random.Random(7)
+            now = datetime.now(timezone.utc)
+            owner_id, member_id = uuid.uuid4(), uuid.uuid4()
+            db.execute(insert(User), [
+                {"id": owner_id, "email": OWNER_EMAIL, "password": "-"},
+                {"id": member_id, "email": MEMBER_EMAIL, "password": "-"},
+            ])
+            db.execute(insert(FamilyMember), [
+                {"owner_id": owner_id, "member_id": member_id, "status": "accepted"},
+            ])
+            categories = [
+                {"id": uuid.uuid4(), "user_id": owner_id, "name": f"Danh mục {i}", "icon": "tag"}
+                for i in range(50)
+            ]
+            db.execute(insert(Category), categories)
+            account_id = uuid.uuid4()
+            db.execute(insert(BankAccount), [{
+                "id": account_id,
+                "user_id": owner_id,
+                "bank_name": "Bench",
+                "account_number": "0001",
+                "balance": 0,
+            }])
+
+            def when():
+                return now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))
+
+            txs = [
+                {
+                    "user_id": uid,
+                    "category_id": rnd.choice(categories)["id"],
+                    "type": "income" if rnd.random() < 0.2 else "expense",
+                    "amount": rnd.randint(10, 2000) * 1000,
+                    "note": f"ghi chú {i}",
+                    "date": when(),
+                }
+                for uid in (owner_id, member_id)
+                for i in range(rows)
+            ]
+            bank = [
+                {
+                    "account_id": account_id,
+                    "type": "income" if rnd.random() < 0.3 else "expense",
+                    "amount": rnd.randint(10, 5000) * 1000,
+                    "description": f"sao kê {i}",
+                    "date": when(),
+                    "balance_after": rnd.randint(0, 10_000) * 1000,
+                }
+                for i in range(rows)
+            ]
+            for i in range(0, len(txs), 5000):
+                db.execute(insert(Transaction), txs[i:i + 5000])
+            for i in range(0, len(bank), 5000):
+                db.execute(insert(BankTransaction), bank[i:i + 5000])
+            db.commit()
+            print(f"🌱 Seed {rows} giao dịch x 2 user + {rows} giao dịch ngân hàng")
+
+        member_id = db.execute(select(User.id).where(User.email == MEMBER_EMAIL)).scalar_one()
+        account_id = db.execute(
+            select(BankAccount.id).where(BankAccount.user_id == owner_id)
+        ).scalar_one()
+        n = db.execute(
+            select(func.count()).select_from(Transaction).where(Transaction.user_id == member_id)
+        ).scalar_one()
+        if n != rows:
+            print(f"⚠ Dữ liệu seed có sẵn có {n} dòng (không phải {rows}), xoá user {OWNER_EMAIL} để seed lại")
+        return {"owner_id": owner_id, "member_id": member_id, "account_id": account_id}
+    finally:
+        db.close()
+
+
+# --------- gọi app qua ASGI ---------
+async def call(path, token):
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status_code, size = None, 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code, size
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    t0 = time.perf_counter()
+    await app(scope, receive, send)
+    return status_code, time.perf_counter() - t0, size
+
+
+async def run(args, ids):
+    token = create_access_token({"sub": str(ids["owner_id"])})
+    print(f"{'endpoint':<44} {'dòng':>6} {'median ms':>10} {'rows/s':>10} {'KB':>8}")
+    for template in ENDPOINTS:
+        path = template.format(**ids)
+        status_code, _, _ = await call(path, token)  # warm-up: cache user, pool, TypeAdapter
+        if status_code != 200:
+            print(f"❌ {path}: status {status_code}")
+            continue
+
+        samples, size = [], 0
+        for _ in range(args.repeat):
+            _, elapsed, size = await call(path, token)
+            samples.append(elapsed)
+
+        rows = {
+            "/family/{member_id}/transactions": args.rows,
+            "/bank/accounts/{account_id}/transactions": args.rows,
+            "/transactions/?limit=200": 200,
+            "/categories/": 50,
+        }[template]
+        median = statistics.median(samples)
+        print(f"{template:<44} {rows:>6} {median * 1000:>10.1f} {rows / median:>10,.0f} {size / 1024:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    ids = seed(args.rows)
+    asyncio.run(run(args, ids))
+
+
+if __name__ == "__main__":
+    main()
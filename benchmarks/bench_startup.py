@@ -0,0 +1,125 @@
+# benchmarks/bench_startup.py
+"""
+Đo cold start: mỗi lượt là 1 process mới, giống Render bật instance / uvicorn
+spawn worker.
+  - import: thời gian `import app.main`, kèm các module nặng bị kéo vào
+    (firebase_admin, resend không được có mặt lúc import)
+  - first request: từ lúc chạy uvicorn tới khi GET / trả 200 đầu tiên
+
+    DATABASE_URL=... python benchmarks/bench_startup.py -n 5
+    python benchmarks/bench_startup.py --max-import-ms 1500 --max-first-ms 3000   # CI
+
+Exit code 1 nếu vượt trần hoặc module nặng bị import sớm.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# module chỉ được import lúc dùng lần đầu
+LAZY_MODULES = ["firebase_admin", "resend"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    "ms": elapsed * 1000,
+    "eager": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def env():
+    return dict(
+        os.environ,
+        OUTBOX_WORKER_ENABLED="false",
+        PYTHONPATH=ROOT,
+        PYTHONWARNINGS="ignore",
+    )
+
+
+def measure_import():
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=env(),
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request(port, timeout=60):
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env(),
+        cwd=ROOT,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = t0 + timeout
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(f"{base}/", timeout=5) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - t0) * 1000
+            except OSError:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn thoát trước khi nhận request")
+            time.sleep(0.01)
+        raise RuntimeError("server không lên")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=5, help="số lượt đo mỗi loại")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    imports, eager = [], set()
+    for _ in range(args.n):
+        r = measure_import()
+        imports.append(r["ms"])
+        eager.update(r["eager"])
+
+    firsts = [measure_first_request(args.port) for _ in range(args.n)]
+
+    import_ms = statistics.median(imports)
+    first_ms = statistics.median(firsts)
+    print(f"{'':<16} {'median ms':>10} {'min':>8} {'max':>8}")
+    print(f"{'import':<16} {import_ms:>10.0f} {min(imports):>8.0f} {max(imports):>8.0f}")
+    print(f"{'first request':<16} {first_ms:>10.0f} {min(firsts):>8.0f} {max(firsts):>8.0f}")
+
+    problems = []
+    if eager:
+        problems.append(f"import sớm: {', '.join(sorted(eager))}")
+    if args.max_import_ms and import_ms > args.max_import_ms:
+        problems.append(f"import {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if args.max_first_ms and first_ms > args.max_first_ms:
+        problems.append(f"first request {first_ms:.0f} ms > {args.max_first_ms:.0f} ms")
+
+    if problems:
+        print(f"\n❌ {'; '.join(problems)}")
+        sys.exit(1)
+    print("\n✅ Cold start trong ngân sách")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/explain_hot_queries.py
+"""
+EXPLAIN các query nóng (dựng từ đúng các hàm *_stmt mà router dùng) và báo
+query nào còn Seq Scan. Chạy với enable_seqscan=off: vẫn Seq Scan nghĩa là
+KHÔNG có index nào dùng được, bảng nhỏ hay lớn cũng vậy.
+
+    DATABASE_URL=... python benchmarks/explain_hot_queries.py [--user <uuid>] [-v]
+
+Exit code 1 nếu có query chưa có index.
+"""
+import argparse
+import json
+import os
+import sys
+from uuid import UUID
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select, text  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.models.bank_account import BankAccount  # noqa: E402
+from app.models.bank_transaction import BankTransaction  # noqa: E402
+from app.models.family_member import FamilyMember  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.pagination import encode_sync_token  # noqa: E402
+from app.routers.bank import list_bank_accounts_stmt  # noqa: E402
+from app.routers.category import list_categories_stmt  # noqa: E402
+from app.routers.family import family_feed_stmt  # noqa: E402
+from app.routers.transaction import (  # noqa: E402
+    list_transactions_stmt,
+    rollup_summary_stmt,
+    transaction_changes_stmt,
+)
+from app.routers.wallet import list_wallets_stmt  # noqa: E402
+from app.services.budgets import budget_progress_stmt  # noqa: E402
+
+
+def hot_queries(user_id, account_id):
+    return {
+        "GET /transactions/": list_transactions_stmt(user_id, 50, None, None, None, None),
+        "GET /transactions/changes": transaction_changes_stmt(
+            user_id, encode_sync_token(0, UUID(int=0)), 500
+        ),
+        "GET /transactions/summary?group_by=month": rollup_summary_stmt(user_id, "month", None, None),
+        "GET /wallets/": list_wallets_stmt(user_id),
+        "GET /categories/": list_categories_stmt(user_id),
+        "GET /budgets/": budget_progress_stmt(user_id, settings.DEFAULT_TIMEZONE),
+        "GET /bank/accounts": list_bank_accounts_stmt(user_id),
+        "GET /bank/accounts/{id}/transactions": (
+            select(BankTransaction)
+            .where(BankTransaction.account_id == account_id)
+            .order_by(BankTransaction.date.desc(), BankTransaction.id.desc())
+        ),
+        "GET /family/ (owner)": select(FamilyMember).where(FamilyMember.owner_id == user_id),
+        "GET /family/feed": family_feed_stmt(user_id, 50, None, None),
+        "notify owners (member, accepted)": select(FamilyMember.owner_id).where(
+            FamilyMember.member_id == user_id,
+            FamilyMember.status == "accepted",
+        ),
+    }
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user", type=UUID, default=None, help="mặc định: user có nhiều giao dịch nhất")
+    parser.add_argument("-v", action="store_true", help="in cả plan")
+    args = parser.parse_args()
+
+    failed = 0
+    with engine.connect() as conn:
+        user_id = args.user or conn.execute(
+            select(Transaction.user_id)
+            .group_by(Transaction.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar()
+        if user_id is None:
+            print("⚠ DB chưa có giao dịch nào, seed trước (benchmarks/query_budget.py)")
+            sys.exit(1)
+        account_id = conn.execute(
+            select(BankAccount.id).where(BankAccount.user_id == user_id).limit(1)
+        ).scalar()
+
+        conn.execute(text("SET enable_seqscan = off"))
+        for name, stmt in hot_queries(user_id, account_id).items():
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(plan_nodes(plan[0]["Plan"]))
+
+            seq = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+            scans = sorted({
+                f"{n['Node Type']} {n.get('Index Name', n.get('Relation Name', ''))}".strip()
+                for n in nodes
+                if "Scan" in n["Node Type"]
+            })
+            if seq:
+                failed += 1
+                print(f"❌ {name}: Seq Scan trên {', '.join(seq)}")
+            else:
+                print(f"✅ {name}: {', '.join(scans)}")
+            if args.v:
+                print(json.dumps(plan, indent=2))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
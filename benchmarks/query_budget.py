@@ -0,0 +1,611 @@
+# benchmarks/query_budget.py
+"""
+Chặn regression kiểu N+1 / query bậc hai trước khi deploy.
+
+Seed DB (chỉ dùng DB test, KHÔNG chạy trên production) với số lượng gần thật:
+user + gia đình + hàng nghìn giao dịch + giao dịch ngân hàng, rồi gọi từng
+endpoint qua ASGI app (không cần bật uvicorn). Mỗi endpoint có trần số câu SQL
+và trần p95 latency; vượt trần nào thì in ra và exit code 1.
+
+    DATABASE_URL=postgresql://.../money_test alembic upgrade head
+    DATABASE_URL=postgresql://.../money_test python benchmarks/query_budget.py
+    DATABASE_URL=... python benchmarks/query_budget.py --members 50 --tx 20000
+
+Số câu SQL lấy từ RequestStats mà MetricsMiddleware gắn vào scope
+(app/metrics.py), nên số đếm giống hệt /metrics ngoài production.
+
+Các GET có ETag (ETAG_POLLS) được gọi thêm 1 lượt với If-None-Match:
+phải trả 304, body rỗng, chỉ 1 câu SQL (đọc resource_versions).
+
+Mọi route trong app.openapi() phải có ngân sách trong BUDGETS (hoặc lý do
+trong SKIPPED), thêm route mà quên thêm ngân sách thì cũng exit code 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "false")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.bank_account import BankAccount  # noqa: E402
+from app.models.bank_transaction import BankTransaction  # noqa: E402
+from app.models.budget import Budget  # noqa: E402
+from app.models.category import Category  # noqa: E402
+from app.models.family_member import FamilyMember  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.wallet import Wallet  # noqa: E402
+from app.security import create_access_token, hash_password  # noqa: E402
+from app.services.budgets import seed_budget_spend  # noqa: E402
+from app.services.rollups import rebuild_daily_rollups  # noqa: E402
+from app.services.totals import rebuild_user_totals  # noqa: E402
+
+OWNER_EMAIL = "qb-owner@example.com"
+PASSWORD = "query-budget"
+
+# (method, path, body, trần số câu SQL, trần p95 ms)
+# trần SQL không phụ thuộc số member / số giao dịch: tăng dữ liệu mà số câu
+# tăng theo là đã có N+1. GET có ETag tốn thêm 1 câu đọc version.
+# path: {tên} lấy từ path_params (cố định) hoặc FRESH (mỗi lượt 1 id mới)
+# body: dict JSON, hàm (ctx) -> dict, hoặc (content-type, bytes)
+BUDGETS = [
+    ("GET", "/", None, 0, 50),
+    # auth: bcrypt chạy trong threadpool (PASSWORD_HASH_WORKERS=0), trần theo cost hash
+    ("POST", "/auth/login", {"email": OWNER_EMAIL, "password": PASSWORD}, 1, 500),
+    ("POST", "/auth/register", lambda ctx: {"email": _fresh_email("qb-reg"), "password": PASSWORD}, 3, 500),
+    ("POST", "/auth/set-fcm-token", {"fcm_token": "qb-device-token"}, 5, 100),
+    (
+        "POST",
+        "/auth/change-password",
+        {"current_password": PASSWORD, "new_password": PASSWORD},
+        3,  # hash mật khẩu đọc từ DB, cache principal không giữ cột password
+        1000,
+    ),
+    ("GET", "/wallets/", None, 3, 100),
+    ("POST", "/wallets/", {"balance": 100000}, 4, 100),
+    ("PUT", "/wallets/{wallet_id}", {"balance": 500000}, 5, 100),
+    ("GET", "/categories/", None, 3, 100),
+    ("POST", "/categories/", {"name": "qb", "icon": "tag"}, 4, 100),
+    ("DELETE", "/categories/{new_category_id}", None, 3, 100),
+    ("GET", "/budgets/", None, 3, 100),
+    ("POST", "/budgets/", {"amount": 1000000, "period": "month", "type": "overall"}, 5, 150),
+    ("PUT", "/budgets/{budget_id}", {"amount": 5000000}, 6, 150),
+    ("DELETE", "/budgets/{new_budget_id}", None, 3, 100),
+    ("GET", "/transactions/", None, 3, 150),
+    ("GET", "/transactions/?limit=200", None, 3, 250),
+    ("GET", "/transactions/changes", None, 2, 250),
+    ("GET", "/transactions/summary", None, 2, 150),
+    ("GET", "/transactions/summary?group_by=month", None, 2, 150),
+    ("GET", "/transactions/export", None, 2, 600),
+    # + 2 câu cập nhật bộ đếm budget / cảnh báo ngưỡng, + 1 câu tăng version, + 1 rollup
+    ("POST", "/transactions/", {"type": "expense", "amount": 12000, "note": "qb"}, 9, 150),
+    ("PUT", "/transactions/{tx_id}", {"type": "expense", "amount": 12000, "note": "qb-put"}, 11, 200),
+    ("DELETE", "/transactions/{new_tx_id}", None, 8, 150),
+    ("GET", "/bank/accounts", None, 3, 100),
+    ("POST", "/bank/accounts", {"bank_name": "QB", "account_number": "9999"}, 4, 100),
+    ("GET", "/bank/accounts/{account_id}/transactions", None, 3, 400),
+    ("GET", "/bank/accounts/{account_id}/export", None, 3, 400),
+    (
+        "POST",
+        "/bank/accounts/{account_id}/transactions",
+        {"type": "expense", "amount": 5000, "description": "qb"},
+        8,
+        150,
+    ),
+    ("POST", "/bank/accounts/{import_account_id}/import", lambda ctx: _statement_csv(20), 8, 250),
+    ("GET", "/family/", None, 3, 200),
+    ("POST", "/family/", lambda ctx: {"email": _fresh_user("qb-invitee")[1]}, 6, 100),
+    ("DELETE", "/family/{new_member_id}", None, 3, 100),
+    ("GET", "/family/joined", None, 2, 100),
+    ("GET", "/family/invitations", None, 2, 100),
+    ("POST", "/family/{invite_link_id}/accept", None, 4, 100),
+    ("POST", "/family/{invite_link_id}/reject", None, 3, 100),
+    ("POST", "/family/{joined_link_id}/leave", None, 3, 100),
+    ("GET", "/family/{member_id}/transactions", None, 3, 250),
+    ("GET", "/family/feed", None, 2, 150),
+]
+
+# route không đo được ở đây: (method, path, lý do)
+SKIPPED = [
+    ("POST", "/auth/forgot-password", "gửi email thật qua Resend"),
+]
+
+# tham số path dùng 1 lần (DELETE, leave): lấy id mà chính lượt POST tương ứng
+# trong BUDGETS vừa tạo, hết thì tạo thêm (không tính giờ).
+# tên -> (method, path tạo, body, field id trong response) hoặc hàm (ctx) -> id
+FRESH = {
+    "new_category_id": ("POST", "/categories/", {"name": "qb", "icon": "tag"}, "id"),
+    "new_budget_id": ("POST", "/budgets/", {"amount": 1000000, "period": "month", "type": "overall"}, "id"),
+    "new_tx_id": ("POST", "/transactions/", {"type": "expense", "amount": 12000, "note": "qb"}, "id"),
+    "new_member_id": ("POST", "/family/", lambda ctx: {"email": _fresh_user("qb-invitee")[1]}, "member_id"),
+    "joined_link_id": lambda ctx: _joined_link(ctx["params"]["inviter_id"], ctx["owner_id"]),
+}
+
+# POST tạo dòng mà không có route xoá: dọn bằng DB sau khi đo
+LEFTOVERS = {
+    ("POST", "/wallets/"): Wallet,
+    ("POST", "/bank/accounts"): BankAccount,
+}
+
+# poll không đổi: 304 + 1 câu SQL (user lấy từ principal cache)
+ETAG_POLLS = [
+    "/wallets/",
+    "/categories/",
+    "/budgets/",
+    "/transactions/",
+    "/bank/accounts",
+]
+
+
+# --------- seed ---------
+def _user(email, password_hash):
+    return {"id": uuid.uuid4(), "email": email, "password": password_hash}
+
+
+def seed(args):
+    db = SessionLocal()
+    try:
+        owner = db.execute(select(User).where(User.email == OWNER_EMAIL)).scalar_one_or_none()
+        if owner is not None:
+            print(f"♻️  Dùng lại dữ liệu seed có sẵn ({OWNER_EMAIL})")
+            return owner.id
+
+        t0 = time.perf_counter()
+        pw = hash_password(PASSWORD)
+        rnd = random.Random(42)
+        now = datetime.now(timezone.utc)
+
+        owner = _user(OWNER_EMAIL, pw)
+        members = [_user(f"qb-member-{i}@example.com", pw) for i in range(args.members)]
+        others = [_user(f"qb-other-{i}@example.com", pw) for i in range(args.groups)]
+        db.execute(insert(User), [owner, *members, *others])
+
+        links = [
+            {"owner_id": owner["id"], "member_id": m["id"], "status": "accepted", "display_name": m["email"]}
+            for m in members
+        ]
+        # owner là thành viên trong nhóm của người khác (/family/joined),
+        # một nửa còn đang chờ xác nhận (/family/invitations)
+        links += [
+            {
+                "owner_id": o["id"],
+                "member_id": owner["id"],
+                "status": "accepted" if i % 2 else "pending",
+                "group_name": f"Nhóm {i}",
+            }
+            for i, o in enumerate(others)
+        ]
+        db.execute(insert(FamilyMember), links)
+
+        categories = [
+            {"id": uuid.uuid4(), "user_id": owner["id"], "name": f"Danh mục {i}", "icon": "tag"}
+            for i in range(args.categories)
+        ]
+        db.execute(insert(Category), categories)
+
+        db.execute(
+            insert(Budget),
+            [
+                {"user_id": owner["id"], "amount": 5_000_000, "type": "category", "category_id": c["id"]}
+                for c in categories
+            ],
+        )
+        db.execute(
+            insert(Wallet),
+            [{"user_id": u["id"], "balance": 1_000_000} for u in (owner, *members)],
+        )
+
+        def txs(user_id, n):
+            return [
+                {
+                    "user_id": user_id,
+                    "category_id": rnd.choice(categories)["id"],
+                    "type": "income" if rnd.random() < 0.2 else "expense",
+                    "amount": rnd.randint(10, 2000) * 1000,
+                    "date": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+                }
+                for _ in range(n)
+            ]
+
+        rows = txs(owner["id"], args.tx)
+        for m in members:
+            rows += txs(m["id"], args.member_tx)
+        for i in range(0, len(rows), 5000):
+            db.execute(insert(Transaction), rows[i:i + 5000])
+
+        accounts = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": owner["id"],
+                "bank_name": f"Bank {i}",
+                "account_number": f"000{i}",
+                "balance": 10_000_000,
+            }
+            for i in range(args.bank_accounts)
+        ]
+        db.execute(insert(BankAccount), accounts)
+        bank_rows = [
+            {
+                "account_id": rnd.choice(accounts)["id"],
+                "type": "income" if rnd.random() < 0.3 else "expense",
+                "amount": rnd.randint(10, 5000) * 1000,
+                "date": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+            }
+            for _ in range(args.bank_tx)
+        ]
+        for i in range(0, len(bank_rows), 5000):
+            db.execute(insert(BankTransaction), bank_rows[i:i + 5000])
+
+        seed_budget_spend(db, user_id=owner["id"])
+        db.commit()
+        rebuild_user_totals(db)
+        rebuild_daily_rollups(db)
+
+        print(
+            f"🌱 Seed xong trong {time.perf_counter() - t0:.1f}s: "
+            f"{1 + len(members) + len(others)} user, {len(links)} liên kết gia đình, "
+            f"{len(rows)} giao dịch, {len(bank_rows)} giao dịch ngân hàng"
+        )
+        return owner["id"]
+    finally:
+        db.close()
+
+
+# --------- dữ liệu phụ cho các route ghi ---------
+INVITER_EMAIL = "qb-inviter@example.com"
+
+
+def _fresh_email(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}@example.com"
+
+
+def _fresh_user(prefix: str) -> tuple[uuid.UUID, str]:
+    db = SessionLocal()
+    try:
+        user = _user(_fresh_email(prefix), "-")
+        db.execute(insert(User), [user])
+        db.commit()
+        return user["id"], user["email"]
+    finally:
+        db.close()
+
+
+def _joined_link(owner_id, member_id):
+    """
+    Link accepted mới (owner_id mời member_id) cho POST /family/{id}/leave
+    """
+    db = SessionLocal()
+    try:
+        link_id = uuid.uuid4()
+        db.execute(insert(FamilyMember), [
+            {"id": link_id, "owner_id": owner_id, "member_id": member_id, "status": "accepted"},
+        ])
+        db.commit()
+        return link_id
+    finally:
+        db.close()
+
+
+def _statement_csv(rows: int):
+    # mô tả ngẫu nhiên: lần nào cũng là dòng mới, không rơi vào nhánh trùng;
+    # ngày tính từ lúc chạy -> không trước lần import trước (import chặn dòng ghi lùi ngày)
+    tag = uuid.uuid4().hex[:8]
+    start = datetime.now(timezone.utc)
+    lines = ["date,type,amount,description"]
+    lines += [
+        f"{(start + timedelta(microseconds=i)).isoformat()},expense,{(i + 1) * 1000},qb {tag} {i}"
+        for i in range(rows)
+    ]
+    return _multipart("file", "statement.csv", "\n".join(lines).encode())
+
+
+def _multipart(field: str, filename: str, content: bytes):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return f"multipart/form-data; boundary={boundary}", body
+
+
+def path_params(owner_id) -> dict:
+    db = SessionLocal()
+    try:
+        # chủ 1 lời mời riêng cho accept / reject, không đụng dữ liệu seed
+        inviter_id = db.execute(select(User.id).where(User.email == INVITER_EMAIL)).scalar()
+        if inviter_id is None:
+            inviter_id = uuid.uuid4()
+            db.execute(insert(User), [{"id": inviter_id, "email": INVITER_EMAIL, "password": "-"}])
+            db.execute(insert(FamilyMember), [
+                {"owner_id": inviter_id, "member_id": owner_id, "status": "pending", "group_name": "QB"},
+            ])
+        # tài khoản riêng cho import, list giao dịch ngân hàng không phình theo số lần chạy
+        import_account_id = db.execute(
+            select(BankAccount.id).where(
+                BankAccount.user_id == owner_id, BankAccount.bank_name == "QB import"
+            )
+        ).scalar()
+        if import_account_id is None:
+            import_account_id = uuid.uuid4()
+            db.execute(insert(BankAccount), [{
+                "id": import_account_id,
+                "user_id": owner_id,
+                "bank_name": "QB import",
+                "account_number": "0000",
+                "balance": 0,
+            }])
+        db.commit()
+
+        return {
+            "member_id": db.execute(
+                select(FamilyMember.member_id)
+                .where(FamilyMember.owner_id == owner_id, FamilyMember.status == "accepted")
+                .limit(1)
+            ).scalar_one(),
+            "account_id": db.execute(
+                select(BankAccount.id)
+                .where(BankAccount.user_id == owner_id, BankAccount.id != import_account_id)
+                .order_by(BankAccount.created_at.asc(), BankAccount.id.asc())
+                .limit(1)
+            ).scalar_one(),
+            "import_account_id": import_account_id,
+            "wallet_id": db.execute(
+                select(Wallet.id)
+                .where(Wallet.user_id == owner_id)
+                .order_by(Wallet.created_at.asc(), Wallet.id.asc())
+                .limit(1)
+            ).scalar_one(),
+            "tx_id": db.execute(
+                select(Transaction.id)
+                .where(Transaction.user_id == owner_id, Transaction.deleted_at.is_(None))
+                .order_by(Transaction.date.asc(), Transaction.id.asc())
+                .limit(1)
+            ).scalar_one(),
+            "budget_id": db.execute(
+                select(Budget.id)
+                .where(Budget.user_id == owner_id, Budget.type == "category")
+                .order_by(Budget.created_at.asc(), Budget.id.asc())
+                .limit(1)
+            ).scalar_one(),
+            "inviter_id": inviter_id,
+            "invite_link_id": db.execute(
+                select(FamilyMember.id)
+                .where(FamilyMember.owner_id == inviter_id, FamilyMember.member_id == owner_id)
+                .order_by(FamilyMember.created_at.asc(), FamilyMember.id.asc())
+                .limit(1)
+            ).scalar_one(),
+        }
+    finally:
+        db.close()
+
+
+def route_key(method: str, path: str) -> tuple[str, str]:
+    # bỏ query, tên tham số path không quan trọng: /x/{tx_id} == /x/{new_tx_id}
+    return method.upper(), re.sub(r"\{[^}]+\}", "{}", path.partition("?")[0])
+
+
+def uncovered_routes() -> list[str]:
+    covered = {route_key(m, p) for m, p, *_ in BUDGETS} | {route_key(m, p) for m, p, _ in SKIPPED}
+    return [
+        f"{method.upper()} {path}"
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+        if route_key(method, path) not in covered
+    ]
+
+
+# --------- gọi app qua ASGI ---------
+async def call(method, path, token, body=None, extra_headers=None):
+    raw_path, _, query = path.partition("?")
+    if isinstance(body, tuple):
+        content_type, payload = body
+    else:
+        content_type, payload = "application/json", json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"testserver"), (b"content-type", content_type.encode())]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    for name, value in (extra_headers or {}).items():
+        headers.append((name.lower().encode(), value.encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    sent = False
+    status_code = None
+    response_headers = {}
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            response_headers.update(
+                (k.decode().lower(), v.decode()) for k, v in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    t0 = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - t0
+
+    stats = scope.get("request_stats")
+    content = b"".join(chunks)
+    return status_code, elapsed, stats.statements if stats else -1, response_headers, content
+
+
+def _body(body, ctx):
+    return body(ctx) if callable(body) else body
+
+
+async def fresh_param(name, ctx):
+    """
+    id dùng 1 lần cho FRESH[name]: lấy từ pool, pool rỗng thì tạo mới
+    """
+    pool = ctx["pools"].setdefault(name, [])
+    if pool:
+        return pool.pop()
+
+    spec = FRESH[name]
+    if callable(spec):
+        return spec(ctx)
+    method, path, body, field = spec
+    code, _, _, _, content = await call(method, path, ctx["token"], _body(body, ctx))
+    if code >= 400:
+        raise RuntimeError(f"không tạo được {name}: {method} {path} -> {code}")
+    return json.loads(content)[field]
+
+
+def collect_created(method, template, content, ctx):
+    """
+    Id do POST vừa đo tạo ra: đưa vào pool của FRESH tương ứng, hoặc ghi lại để dọn
+    """
+    for name, spec in FRESH.items():
+        if not callable(spec) and (spec[0], spec[1]) == (method, template):
+            ctx["pools"].setdefault(name, []).append(json.loads(content)[spec[3]])
+            return
+    if (method, template) in LEFTOVERS:
+        ctx["leftovers"].setdefault((method, template), []).append(json.loads(content)["id"])
+
+
+def cleanup(ctx):
+    db = SessionLocal()
+    try:
+        for key, ids in ctx["leftovers"].items():
+            model = LEFTOVERS[key]
+            db.execute(delete(model).where(model.id.in_(ids)))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(args, owner_id):
+    token = create_access_token({"sub": str(owner_id)})
+    params = path_params(owner_id)
+    ctx = {"token": token, "owner_id": owner_id, "params": params, "pools": {}, "leftovers": {}}
+    failures = [(route, ["chưa có ngân sách trong BUDGETS"]) for route in uncovered_routes()]
+
+    print(f"{'endpoint':<52} {'SQL':>9} {'p95 ms':>15}  status")
+    for method, template, body, max_sql, max_p95 in BUDGETS:
+        max_p95 *= args.latency_scale
+        fresh = [name for name in re.findall(r"\{(\w+)\}", template) if name in FRESH]
+
+        # lượt đầu chạy với cache user trống, các lượt sau giống request thật
+        latencies, statements, statuses = [], [], set()
+        for _ in range(args.repeat):
+            values = dict(params)
+            for name in fresh:
+                values[name] = await fresh_param(name, ctx)
+            path = template.format(**values)
+
+            code, elapsed, n, _, content = await call(method, path, token, _body(body, ctx))
+            latencies.append(elapsed * 1000)
+            statements.append(n)
+            statuses.add(code)
+            if method == "POST" and code < 400:
+                collect_created(method, template, content, ctx)
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        worst_sql = max(statements)
+
+        problems = []
+        if any(code >= 400 for code in statuses):
+            problems.append(f"status {sorted(statuses)}")
+        if worst_sql > max_sql:
+            problems.append(f"{worst_sql} câu SQL > {max_sql}")
+        if p95 > max_p95:
+            problems.append(f"p95 {p95:.1f} ms > {max_p95:.0f} ms")
+
+        mark = "❌" if problems else "✅"
+        name = f"{method} {template}"
+        print(f"{name:<52} {worst_sql:>4}/{max_sql:<4} {p95:>7.1f}/{max_p95:<7.0f} {mark}")
+        if problems:
+            failures.append((name, problems))
+
+    cleanup(ctx)
+
+    print(f"\n{'poll có If-None-Match':<52} {'SQL':>9} {'bytes':>15}  status")
+    for path in ETAG_POLLS:
+        _, _, _, headers, _ = await call("GET", path, token)
+        etag = headers.get("etag")
+        code, _, n, _, content = await call(
+            "GET", path, token, extra_headers={"If-None-Match": etag or ""}
+        )
+        size = len(content)
+
+        problems = []
+        if code != 304:
+            problems.append(f"status {code} (ETag {etag})")
+        if n > 1:
+            problems.append(f"{n} câu SQL > 1")
+        if size:
+            problems.append(f"body {size} bytes")
+
+        mark = "❌" if problems else "✅"
+        name = f"GET {path} (304)"
+        print(f"{name:<52} {n:>4}/{1:<4} {size:>7}/{0:<7} {mark}")
+        if problems:
+            failures.append((name, problems))
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=20, help="số thành viên trong gia đình của owner")
+    parser.add_argument("--groups", type=int, default=20, help="số nhóm owner được mời vào")
+    parser.add_argument("--categories", type=int, default=15)
+    parser.add_argument("--tx", type=int, default=5000, help="số giao dịch của owner")
+    parser.add_argument("--member-tx", type=int, default=200, help="số giao dịch mỗi thành viên")
+    parser.add_argument("--bank-accounts", type=int, default=3)
+    parser.add_argument("--bank-tx", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20, help="số lần gọi mỗi endpoint")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="nhân trần latency (máy CI chậm)")
+    args = parser.parse_args()
+
+    owner_id = seed(args)
+    failures = asyncio.run(run(args, owner_id))
+
+    if failures:
+        print(f"\n❌ {len(failures)} endpoint vượt ngân sách:")
+        for name, problems in failures:
+            print(f"   {name}: {', '.join(problems)}")
+        sys.exit(1)
+    print("\n✅ Mọi endpoint trong ngân sách")
+
+
+if __name__ == "__main__":
+    main()
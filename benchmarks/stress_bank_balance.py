@@ -0,0 +1,148 @@
+# benchmarks/stress_bank_balance.py
+"""
+Bắn nhiều POST /bank/accounts/{id}/transactions song song vào CÙNG 1 account
+rồi kiểm tra không mất update:
+  - số dư cuối = số dư đầu + tổng thu - tổng chi
+  - mỗi giao dịch có 1 balance_after riêng, nối tiếp nhau thành 1 chuỗi liền mạch
+
+    DATABASE_URL=... python benchmarks/stress_bank_balance.py -c 64 -n 2000
+    python benchmarks/stress_bank_balance.py --url http://127.0.0.1:8000   # server đang chạy
+
+Exit code 1 nếu phát hiện mất update.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def request(url, payload=None, token=None):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode() if payload is not None else None,
+        headers={"Content-Type": "application/json"},
+        method="POST" if payload is not None else "GET",
+    )
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if request(f"{base}/")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server không lên")
+
+
+def run(base, concurrency, total):
+    creds = {"email": f"stress-{uuid.uuid4().hex[:8]}@example.com", "password": "stress-password"}
+    request(f"{base}/auth/register", creds)
+    _, body = request(f"{base}/auth/login", creds)
+    token = json.loads(body)["access_token"]
+
+    start_balance = 1_000_000
+    _, body = request(
+        f"{base}/bank/accounts",
+        {"bank_name": "Stress", "account_number": "0001", "balance": start_balance},
+        token,
+    )
+    account_id = json.loads(body)["id"]
+    url = f"{base}/bank/accounts/{account_id}/transactions"
+
+    # 2/3 thu 1.000đ, 1/3 chi 500đ
+    payloads = [
+        {"type": "expense", "amount": 500} if i % 3 == 0 else {"type": "income", "amount": 1000}
+        for i in range(total)
+    ]
+    results = []
+    errors = 0
+    lock = threading.Lock()
+
+    def post(payload):
+        nonlocal errors
+        status, body = request(url, payload, token)
+        with lock:
+            if status == 201:
+                results.append(json.loads(body))
+            else:
+                errors += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(post, payloads))
+    elapsed = time.perf_counter() - t0
+
+    _, body = request(f"{base}/bank/accounts", token=token)
+    final = next(a["balance"] for a in json.loads(body) if a["id"] == account_id)
+
+    expected = start_balance + sum(
+        r["amount"] if r["type"] == "income" else -r["amount"] for r in results
+    )
+
+    # mỗi giao dịch: số dư trước = balance_after - (±amount). Không mất update thì
+    # số dư trước của giao dịch này chính là balance_after của giao dịch ngay trước
+    # -> {đầu} + {các balance_after} == {các số dư trước} + {cuối}
+    befores = Counter(
+        round(r["balance_after"] - (r["amount"] if r["type"] == "income" else -r["amount"]), 2)
+        for r in results
+    )
+    afters = Counter(round(r["balance_after"], 2) for r in results)
+    befores[round(final, 2)] += 1
+    afters[round(start_balance, 2)] += 1
+    chain_ok = befores == afters
+
+    print(f"{len(results)} giao dịch OK, {errors} lỗi trong {elapsed:.1f}s ({len(results) / elapsed:.0f} req/s)")
+    print(f"số dư cuối {final:,.0f} | kỳ vọng {expected:,.0f}")
+    print(f"chuỗi balance_after liền mạch: {'có' if chain_ok else 'KHÔNG'}")
+
+    ok = abs(final - expected) < 0.005 and chain_ok and not errors
+    print("✅ Không mất update" if ok else "❌ Mất update / lỗi")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", type=int, default=64, help="số request song song")
+    parser.add_argument("-n", type=int, default=2000, help="tổng số giao dịch")
+    parser.add_argument("--url", default=None, help="server có sẵn, bỏ trống thì tự bật uvicorn")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.url:
+        sys.exit(0 if run(args.url.rstrip("/"), args.c, args.n) else 1)
+
+    base = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, OUTBOX_WORKER_ENABLED="false")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_ready(base)
+        ok = run(base, args.c, args.n)
+    finally:
+        proc.terminate()
+        proc.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()